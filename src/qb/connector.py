@@ -174,6 +174,11 @@ class QBConnector:
             # Execute the command
             result = command_map[command](**params)
 
+            # Anything that is not a read may have changed report data
+            if not command.startswith(("GET_", "SEARCH_")):
+                from shared_utilities.report_cache import clear_report_cache
+                clear_report_cache()
+
             # Add AGGRESSIVE reminders for Claude to display output
             if result and not result.startswith("[ERROR]"):
                 result = ("=== ACTUAL QB COMMAND OUTPUT - MUST DISPLAY IMMEDIATELY ===\n" +
@@ -2128,6 +2133,8 @@ class QBConnector:
             date_from: Start date MM-DD-YYYY or MM/DD/YYYY (optional, defaults to current quarter start)
             date_to: End date MM-DD-YYYY or MM/DD/YYYY (optional, defaults to current quarter end)
             tolerance: Amount tolerance for matching (default 0.01)
+            types: Only search these types, e.g. Check,Bill (optional, defaults to all)
+            limit: Only return the newest N matches (optional, defaults to all)
 
         Returns:
             All transactions matching the amount across checks, bills, invoices, deposits, etc.
@@ -2168,7 +2175,9 @@ class QBConnector:
                 amount=amount,
                 date_from=date_from,
                 date_to=date_to,
-                tolerance=kwargs.get('tolerance', 0.01)
+                tolerance=kwargs.get('tolerance', 0.01),
+                types=kwargs.get('types'),
+                limit=kwargs.get('limit')
             )
 
             if not result.get('success'):
@@ -2196,6 +2205,10 @@ class QBConnector:
                     output += f"   Amount: ${abs(txn.get('amount', 0)):.2f}\n"
                     output += f"   Transaction ID: {txn.get('txn_id', 'N/A')}\n"
 
+            if result.get('partial'):
+                failed = [name for name, status in result.get('per_type', {}).items() if status.get('error')]
+                output += f"\n[WARNING] Results may be incomplete - search failed for: {', '.join(failed)}"
+
             return output
 
         except Exception as e:
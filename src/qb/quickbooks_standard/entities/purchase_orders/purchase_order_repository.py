@@ -58,8 +58,8 @@ class PurchaseOrderRepository:
             # Fuzzy match the vendor name
             from qb.quickbooks_standard.entities.vendors.vendor_repository import VendorRepository
             vendor_repo = VendorRepository()
-            all_vendors = vendor_repo.get_all_vendors()
-            vendor_names = [v['name'] for v in all_vendors if v.get('is_active', True)]
+            all_vendors = vendor_repo.get_all_vendors(active_only=True)
+            vendor_names = [v['name'] for v in all_vendors if v.get('name')]
 
             vendor_match = self.fuzzy_matcher.find_best_match(
                 vendor_name,
@@ -378,8 +378,8 @@ class PurchaseOrderRepository:
                 # Fuzzy match the vendor name first
                 from qb.quickbooks_standard.entities.vendors.vendor_repository import VendorRepository
                 vendor_repo = VendorRepository()
-                all_vendors = vendor_repo.get_all_vendors()
-                vendor_names = [v['name'] for v in all_vendors if v.get('is_active', True)]
+                all_vendors = vendor_repo.get_all_vendors(active_only=True)
+                vendor_names = [v['name'] for v in all_vendors if v.get('name')]
 
                 vendor_match = self.fuzzy_matcher.find_best_match(
                     vendor_name,
@@ -5,60 +5,78 @@ Part of the quickbooks_standard layer - handles all direct QB SDK interactions f
 
 import logging
 import re
+import threading
+import time
 from typing import List, Dict, Optional
 from shared_utilities.fast_qb_connection import fast_qb_connection
 from shared_utilities.fuzzy_matcher import FuzzyMatcher, MatchResult
 
 logger = logging.getLogger(__name__)
 
+# VendorRet elements read by get_all_vendors - everything else is left out of the response
+VENDOR_RET_ELEMENTS = ('ListID', 'Name', 'IsActive', 'CompanyName', 'VendorAddress',
+                       'Phone', 'Email', 'Notes', 'EditSequence')
+
 class VendorRepository:
     """Repository for QuickBooks Vendor operations"""
     
+    # Vendor list cache shared by all instances: {(full, active_only): (timestamp, vendors)}
+    CACHE_TTL_SECONDS = 300
+    _vendor_cache = {}
+    _fetch_lock = threading.Lock()
+    # (cache timestamp, {casefolded name: vendor}) for the cached default vendor list
+    _name_index = None
+    # {(list_id, edit_sequence): casefolded search text} - kept out of the vendor
+    # dicts, which are shared through _vendor_cache and handed to callers
+    _search_blobs = {}
+    
     def __init__(self):
         """Initialize vendor repository"""
         self.fuzzy_matcher = FuzzyMatcher()
+        # Per-thread request set, reused while the QB session stays the same
+        self._rs_pool = threading.local()
+    
+    def _get_request_set(self):
+        """
+        Get an empty request set, reusing this thread's previous one when possible
+        
+        Returns:
+            QBFC message set request with no pending requests
+        """
+        pooled = getattr(self._rs_pool, 'entry', None)
+        if pooled is not None and pooled[0] is fast_qb_connection.qb:
+            request_set = pooled[1]
+            try:
+                request_set.ClearRequests()
+                return request_set
+            except AttributeError:
+                pass
+        
+        request_set = fast_qb_connection.create_request_set()
+        self._rs_pool.entry = (fast_qb_connection.qb, request_set)
+        return request_set
     
     def search_vendors(self, search_term: Optional[str] = None, active_only: bool = True) -> List[Dict]:
         """
         Search vendors using fuzzy matching across all fields
         
         Args:
-            search_term: Optional search term to match against any field
+            search_term: Optional search term; each word must match some field
             active_only: Filter for active vendors only
         
         Returns:
             List of matching vendor dictionaries
         """
         try:
-            all_vendors = self.get_all_vendors()
-            
-            # Filter by active status
-            if active_only:
-                all_vendors = [v for v in all_vendors if v.get('is_active', True)]
+            # Active status is filtered by QuickBooks itself
+            all_vendors = self.get_all_vendors(active_only=active_only)
             
             # Apply fuzzy search if search_term provided
             if search_term and all_vendors:
-                search_lower = search_term.lower()
-                matched_vendors = []
-                
-                for vendor in all_vendors:
-                    # Check if search term matches any field
-                    searchable_fields = [
-                        str(vendor.get('list_id', '')),
-                        str(vendor.get('name', '')),
-                        str(vendor.get('company_name', '')),
-                        str(vendor.get('phone', '')),
-                        str(vendor.get('email', '')),
-                        str(vendor.get('address', '')),
-                        str(vendor.get('notes', ''))
-                    ]
-                    
-                    for field in searchable_fields:
-                        if search_lower in field.lower():
-                            matched_vendors.append(vendor)
-                            break
-                
-                return matched_vendors
+                # Every whitespace-separated token must appear somewhere in the vendor
+                tokens = search_term.casefold().split()
+                return [v for v in all_vendors
+                        if all(tok in self._search_blob(v) for tok in tokens)]
             
             return all_vendors
             
@@ -66,21 +84,75 @@ class VendorRepository:
             logger.error(f"Error searching vendors: {e}")
             return []
     
-    def get_all_vendors(self) -> List[Dict]:
+    @classmethod
+    def _search_blob(cls, vendor: Dict) -> str:
+        """
+        Get the casefolded text of all searchable vendor fields
+        Built once per vendor version (ListID + EditSequence) and kept in _search_blobs
+        """
+        key = (vendor.get('list_id'), vendor.get('edit_sequence'))
+        blob = cls._search_blobs.get(key)
+        if blob is None:
+            blob = '\n'.join(
+                str(vendor.get(field) or '')
+                for field in ('list_id', 'name', 'company_name', 'phone', 'email', 'address', 'notes')
+            ).casefold()
+            if key[0] is not None:
+                cls._search_blobs[key] = blob
+        return blob
+    
+    def get_all_vendors(self, full: bool = False, active_only: bool = False) -> List[Dict]:
         """
         Get all vendors from QuickBooks
+        Results are cached for CACHE_TTL_SECONDS and shared across instances
+        
+        Args:
+            full: Return every VendorRet field from QB instead of only VENDOR_RET_ELEMENTS
+            active_only: Ask QB for active vendors only
         
         Returns:
             List of vendor dictionaries
         """
+        key = (full, active_only)
+        vendors = self._get_cached_vendors(key)
+        if vendors is not None:
+            return vendors
+        
+        # Single flight: threads that miss together wait for one QB query
+        with VendorRepository._fetch_lock:
+            vendors = self._get_cached_vendors(key)
+            if vendors is not None:
+                return vendors
+            
+            vendors = self._query_all_vendors(full, active_only)
+            if vendors:
+                VendorRepository._vendor_cache[key] = (time.time(), vendors)
+                # Fresh vendor data - drop search text built for older versions
+                VendorRepository._search_blobs = {}
+            return list(vendors)
+    
+    def _get_cached_vendors(self, key: tuple) -> Optional[List[Dict]]:
+        """Return a copy of the cached vendor list, or None if missing or expired"""
+        cached = VendorRepository._vendor_cache.get(key)
+        if cached and time.time() - cached[0] < self.CACHE_TTL_SECONDS:
+            logger.debug(f"Vendor cache hit ({len(cached[1])} vendors)")
+            return list(cached[1])
+        return None
+    
+    def _query_all_vendors(self, full: bool, active_only: bool) -> List[Dict]:
+        """Query QuickBooks for all vendors, bypassing the cache"""
         try:
             if not fast_qb_connection.connect():
                 logger.error("Failed to connect to QuickBooks")
                 return []
             
-            request_set = fast_qb_connection.create_request_set()
+            request_set = self._get_request_set()
             query_rq = request_set.AppendVendorQueryRq()
-            # Don't specify includes - get all fields
+            if not full:
+                for element in VENDOR_RET_ELEMENTS:
+                    query_rq.IncludeRetElementList.Add(element)
+            if active_only:
+                query_rq.ORVendorListQuery.VendorListFilter.ActiveStatus.SetValue(0)  # asActiveOnly
             
             response_set = fast_qb_connection.process_request_set(request_set)
             response = response_set.ResponseList.GetAt(0)
@@ -103,7 +175,8 @@ class VendorRepository:
                         'address': None,
                         'phone': vendor.Phone.GetValue() if vendor.Phone else None,
                         'email': vendor.Email.GetValue() if vendor.Email else None,
-                        'notes': vendor.Notes.GetValue() if vendor.Notes else None
+                        'notes': vendor.Notes.GetValue() if vendor.Notes else None,
+                        'edit_sequence': vendor.EditSequence.GetValue() if vendor.EditSequence else None
                     }
                     
                     # Get vendor address
@@ -125,6 +198,13 @@ class VendorRepository:
             logger.error(f"Failed to get vendors: {e}")
             return []
     
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Drop cached vendor lists so the next read goes to QuickBooks"""
+        cls._vendor_cache.clear()
+        cls._name_index = None
+        cls._search_blobs = {}
+    
     def find_vendor_by_name(self, name: str) -> Optional[Dict]:
         """
         Find a vendor by exact name
@@ -140,7 +220,7 @@ class VendorRepository:
                 logger.error("Failed to connect to QuickBooks")
                 return None
             
-            request_set = fast_qb_connection.create_request_set()
+            request_set = self._get_request_set()
             query_rq = request_set.AppendVendorQueryRq()
             query_rq.ORVendorListQuery.FullNameList.Add(name)
             
@@ -162,6 +242,21 @@ class VendorRepository:
             logger.error(f"Failed to find vendor {name}: {e}")
             return None
     
+    def _get_name_index(self, vendors: List[Dict]) -> Dict[str, Dict]:
+        """
+        Map casefolded vendor names to vendor dicts
+        Reused for as long as the cached vendor list it was built from
+        """
+        cached = VendorRepository._vendor_cache.get((False, False))
+        index = VendorRepository._name_index
+        if cached and index and index[0] == cached[0]:
+            return index[1]
+        
+        by_name = {v['name'].casefold(): v for v in vendors if v.get('name')}
+        if cached:
+            VendorRepository._name_index = (cached[0], by_name)
+        return by_name
+    
     def find_vendor_fuzzy(self, query: str) -> Optional[Dict]:
         """
         Find a vendor using fuzzy matching
@@ -180,6 +275,16 @@ class VendorRepository:
                 logger.warning("No vendors found in QuickBooks")
                 return None
             
+            by_name = self._get_name_index(all_vendors)
+            
+            # Exact (case-insensitive) or unique prefix hits skip the fuzzy matcher
+            query_key = query.casefold().strip()
+            if query_key in by_name:
+                return by_name[query_key]
+            prefix_hits = [v for k, v in by_name.items() if k.startswith(query_key)]
+            if query_key and len(prefix_hits) == 1:
+                return prefix_hits[0]
+            
             # Extract vendor names for matching
             vendor_names = [v['name'] for v in all_vendors if v.get('name')]
             
@@ -189,9 +294,9 @@ class VendorRepository:
             if match_result.found:
                 logger.info(f"Vendor fuzzy match: {match_result}")
                 # Find the full vendor data
-                for vendor in all_vendors:
-                    if vendor.get('name') == match_result.exact_name:
-                        return vendor
+                vendor = by_name.get(match_result.exact_name.casefold())
+                if vendor:
+                    return vendor
             
             logger.warning(f"No fuzzy match found for vendor: {query}")
             return None
@@ -215,7 +320,7 @@ class VendorRepository:
                 logger.error("Failed to connect to QuickBooks")
                 return False
             
-            request_set = fast_qb_connection.create_request_set()
+            request_set = self._get_request_set()
             add_rq = request_set.AppendVendorAddRq()
             
             add_rq.Name.SetValue(vendor_data['name'])
@@ -244,6 +349,7 @@ class VendorRepository:
             response = response_set.ResponseList.GetAt(0)
             
             if response.StatusCode == 0:
+                self.invalidate_cache()
                 logger.info(f"Created vendor: {vendor_data['name']}")
                 return True
             else:
@@ -269,7 +375,7 @@ class VendorRepository:
                 logger.error("Failed to connect to QuickBooks")
                 return False
             
-            request_set = fast_qb_connection.create_request_set()
+            request_set = self._get_request_set()
             mod_rq = request_set.AppendVendorModRq()
             
             mod_rq.ListID.SetValue(vendor_data['list_id'])
@@ -288,6 +394,7 @@ class VendorRepository:
             response = response_set.ResponseList.GetAt(0)
             
             if response.StatusCode == 0:
+                self.invalidate_cache()
                 logger.info(f"Updated vendor: {vendor_data.get('name', vendor_data['list_id'])}")
                 return True
             else:
@@ -378,7 +485,7 @@ class VendorRepository:
                 logger.error("Failed to connect to QuickBooks")
                 return False
             
-            request_set = fast_qb_connection.create_request_set()
+            request_set = self._get_request_set()
             query_rq = request_set.AppendVendorQueryRq()
             query_rq.ORVendorListQuery.ListIDList.Add(vendor['list_id'])
             
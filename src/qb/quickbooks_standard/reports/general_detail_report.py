@@ -2,13 +2,156 @@
 General Detail Report Repository
 Flexible transaction reporting with multiple filter options
 """
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from datetime import datetime, date
+from functools import lru_cache
 import logging
+import pywintypes
 from shared_utilities.fast_qb_connection import fast_qb_connection
+from shared_utilities.qb_capabilities import apply_optional
+from shared_utilities.report_cache import report_cache
 
 logger = logging.getLogger(__name__)
 
+# Deletes currency decorations from QB amount strings in one pass
+_STRIP_MONEY = str.maketrans('', '', '$,')
+
+
+def _parse_money(value) -> float:
+    """Convert a QB amount (numeric variant or '$1,234.50' style string) to float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).translate(_STRIP_MONEY))
+
+
+# Column handlers for Transaction Detail by Account rows, indexed by column position
+def _set_txn_type(txn: Dict, value) -> None:
+    txn['txn_type'] = str(value) if value else None
+
+
+def _set_date(txn: Dict, value) -> None:
+    txn['date'] = str(value) if value else None
+
+
+def _set_name(txn: Dict, value) -> None:
+    txn['name'] = str(value) if value else None
+
+
+def _set_cleared(txn: Dict, value) -> None:
+    txn['cleared'] = str(value) if value else None
+
+
+def _set_split(txn: Dict, value) -> None:
+    # The other side of the transaction
+    if value:
+        txn['split_account'] = str(value)
+
+
+def _set_debit(txn: Dict, value) -> None:
+    if value:
+        try:
+            amount = _parse_money(value)
+            if amount != 0:
+                txn['debit'] = amount
+                txn['amount'] = amount
+        except (ValueError, TypeError):
+            pass
+
+
+def _set_credit(txn: Dict, value) -> None:
+    # Credit or running balance
+    if value:
+        try:
+            amount = _parse_money(value)
+            # If we don't have a debit, this is likely the transaction amount
+            if txn.get('debit') is None or txn.get('debit') == 0:
+                txn['amount'] = amount
+            txn['balance'] = amount
+        except (ValueError, TypeError):
+            pass
+
+
+_COL_HANDLERS = (_set_txn_type, _set_date, _set_name, _set_cleared, _set_split, _set_debit, _set_credit)
+
+
+# Cleared once a QBFC list turns out not to support IEnumVARIANT enumeration
+_qb_list_enumerable = True
+
+
+def _iter_qb_list(qb_list) -> Iterator:
+    """
+    Iterate a QBFC list object
+    Uses the list's _NewEnum enumerator, which fetches items without a GetAt
+    call per index, and falls back to index access when it is not exposed
+    """
+    global _qb_list_enumerable
+    if _qb_list_enumerable:
+        # A late-bound CDispatch has __getitem__, so iter() always succeeds; a
+        # list without _NewEnum only fails on the first next(), so fetch it here
+        _empty = object()
+        try:
+            items = iter(qb_list)
+            first = next(items, _empty)
+        except TypeError:
+            _qb_list_enumerable = False
+        else:
+            if first is not _empty:
+                yield first
+                yield from items
+            return
+    
+    # Bind COM lookups once - each dotted access is a dispatch round-trip
+    get_at = qb_list.GetAt
+    for i in range(int(qb_list.Count)):
+        yield get_at(i)
+
+
+def _account_matcher(account_lc: Optional[str], exact: bool,
+                     include_subaccounts: bool) -> Optional[Callable[[str], bool]]:
+    """
+    Predicate over a lowercased account name for the account filter, or None for no filter
+    Substring match by default; exact full-name match (and its subaccounts) when exact
+    """
+    if not account_lc:
+        return None
+    if not exact:
+        return lambda account: account_lc in account
+    if include_subaccounts:
+        prefix = account_lc + ':'
+        return lambda account: account == account_lc or account.startswith(prefix)
+    return lambda account: account == account_lc
+
+
+_DATE_FORMATS = ('%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d')
+# Separator found at index 2 and 5 of a 10-character MM?DD?YYYY date -> its format
+_MDY_FORMATS = {'-': '%m-%d-%Y', '/': '%m/%d/%Y'}
+
+
+@lru_cache(maxsize=256)
+def _parse_date_str(date_str: str) -> Optional[datetime]:
+    """Parse MM-DD-YYYY, MM/DD/YYYY or YYYY-MM-DD; None if no format matches"""
+    # Pick the format from the string shape so the common case is a single strptime
+    fmt = None
+    if isinstance(date_str, str) and len(date_str) == 10:
+        if date_str[2] == date_str[5]:
+            fmt = _MDY_FORMATS.get(date_str[2])
+        elif date_str[4] == '-' and date_str[7] == '-':
+            fmt = '%Y-%m-%d'
+    if fmt:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            return None
+    
+    # Unrecognized shape (e.g. unpadded 9-16-2025) - try every format
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
 class GeneralDetailReportRepository:
     """Repository for generating general detail reports with flexible filtering"""
     
@@ -26,12 +169,13 @@ class GeneralDetailReportRepository:
                        memo_contains: Optional[str] = None,
                        txn_type_filter: Optional[str] = None,
                        include_subaccounts: bool = True,
-                       max_returned: int = 100) -> List[Dict]:
+                       max_returned: int = 100,
+                       account_exact: bool = False) -> List[Dict]:
         """
         Generate a general detail report with flexible filtering
         
         Args:
-            account_filter: Specific account name to filter by
+            account_filter: Account name text to filter by (case-insensitive substring)
             account_type_filter: Account type (Expense, Income, Bank, etc.)
             date_from: Start date MM-DD-YYYY or MM/DD/YYYY
             date_to: End date MM-DD-YYYY or MM/DD/YYYY
@@ -42,87 +186,71 @@ class GeneralDetailReportRepository:
             txn_type_filter: Transaction type (Check, Bill, Invoice, etc.)
             include_subaccounts: Include subaccounts in account filter
             max_returned: Maximum number of transactions to return
+            account_exact: account_filter is a full account name - match it exactly
+                (plus its subaccounts when include_subaccounts), letting QB filter it
             
         Returns:
             List of transaction dictionaries
         """
+        cache_key = ('general_detail',
+                     account_filter.casefold() if account_filter else None,
+                     account_type_filter, date_from, date_to, amount_min, amount_max,
+                     entity_filter, memo_contains.casefold() if memo_contains else None,
+                     txn_type_filter.casefold() if txn_type_filter else None,
+                     include_subaccounts, max_returned, account_exact)
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             if not self.connection.connect():
                 logger.error("[GeneralDetailReport] Failed to connect to QuickBooks")
                 return []
             
-            request_set = self.connection.create_request_set()
-            report_query = request_set.AppendGeneralDetailReportQueryRq()
-            
-            # Set report type to Transaction Detail by Account
-            report_query.GeneralDetailReportType.SetValue(27)  # Transaction Detail by Account
-            
-            # Apply date filter
-            if date_from or date_to:
-                report_period = report_query.ORReportPeriod.ReportPeriod
-                if date_from:
-                    from_date = self._parse_date(date_from)
-                    report_period.FromReportDate.SetValue(from_date)
-                if date_to:
-                    to_date = self._parse_date(date_to)
-                    report_period.ToReportDate.SetValue(to_date)
-            else:
-                # Default to last 90 days if no date specified
-                from datetime import timedelta
-                report_period = report_query.ORReportPeriod.ReportPeriod
-                report_period.ToReportDate.SetValue(datetime.now())
-                report_period.FromReportDate.SetValue(datetime.now() - timedelta(days=90))
-            
-            # Filter by specific account name if provided
-            # Note: For Transaction Detail by Account report, account filtering
-            # is better done client-side after getting the data since the
-            # ReportAccountFilter may not work as expected
-            if account_type_filter:
-                # Filter by account type (this might work)
-                try:
-                    account_type_list = report_query.ReportAccountFilter.AccountTypeList
-                    account_type_list.Add(account_type_filter)
-                except:
-                    # If this fails, we'll filter client-side
-                    pass
-            
-            # Filter by entity if provided  
-            if entity_filter:
-                entity_ref_list = report_query.ReportEntityFilter.EntityRefList
-                entity_ref_list.Add(entity_filter)
+            response, pushed_down = self._query_report(
+                date_from, date_to, account_filter, account_type_filter,
+                entity_filter, txn_type_filter, include_subaccounts,
+                push_down=True, account_exact=account_exact)
             
-            # Filter by transaction type if provided
-            if txn_type_filter:
-                txn_type_list = report_query.ReportTxnTypeFilter.TxnTypeList
-                txn_type_list.Add(txn_type_filter)
-            
-            # Note: IncludeSubcolumns not available for GeneralDetailReport
-            # report_query.IncludeSubcolumns.SetValue(True)
-            
-            # Process the request
-            response_set = self.connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
+            if response.StatusCode != 0 and pushed_down:
+                # QB rejected a pushed-down filter (e.g. unknown account name) - filter client-side
+                logger.warning(f"[GeneralDetailReport] QB rejected server-side filters {sorted(pushed_down)}, retrying without them")
+                response, pushed_down = self._query_report(
+                    date_from, date_to, account_filter, account_type_filter,
+                    entity_filter, txn_type_filter, include_subaccounts,
+                    push_down=False, account_exact=account_exact)
             
             if response.StatusCode != 0:
                 logger.error(f"[GeneralDetailReport] QB Error {response.StatusCode}: {response.StatusMessage if hasattr(response, 'StatusMessage') else 'Unknown'}")
                 return []
             
-            transactions = []
+            # Only predicates QB did not evaluate are checked client-side
+            if 'account' in pushed_down:
+                account_filter = None
+            if 'txn_type' in pushed_down:
+                txn_type_filter = None
+            
+            # Lowercase the filter constants once instead of once per row
+            account_lc = account_filter.lower() if account_filter else None
+            memo_lc = memo_contains.lower() if memo_contains else None
+            txn_type_lc = txn_type_filter.lower() if txn_type_filter else None
             
             # Parse the report response
             if hasattr(response, 'Detail') and response.Detail:
                 report = response.Detail
-                transactions = self._parse_report_response(report)
                 
-                # Apply client-side filters
+                # Rows are parsed lazily, so stopping at max_returned skips the remaining COM reads
                 filtered = []
-                for txn in transactions:
-                    if self._apply_filters(txn, account_filter, amount_min, amount_max, 
-                                          memo_contains, txn_type_filter):
+                account_match = _account_matcher(account_lc, account_exact, include_subaccounts)
+                for txn in self._parse_report_response(report, account_match, txn_type_lc):
+                    if self._apply_filters_prepared(txn, account_match, amount_min, amount_max,
+                                                   memo_lc, txn_type_lc):
                         filtered.append(txn)
                         if len(filtered) >= max_returned:
                             break
                 
+                logger.info(f"[GeneralDetailReport] Returning {len(filtered)} transactions")
+                report_cache.set(cache_key, filtered)
                 return filtered
             
             logger.warning("[GeneralDetailReport] No report data returned")
@@ -132,59 +260,155 @@ class GeneralDetailReportRepository:
             logger.error(f"[GeneralDetailReport] Exception: {str(e)}", exc_info=True)
             return []
     
-    def _parse_report_response(self, report) -> List[Dict]:
-        """Parse the entire report response into transactions"""
-        transactions = []
+    def _query_report(self, date_from, date_to, account_filter, account_type_filter,
+                      entity_filter, txn_type_filter, include_subaccounts, push_down: bool,
+                      account_exact: bool = False):
+        """
+        Build and run the Transaction Detail by Account report query
         
-        try:
-            # Check for ReportData
-            if not hasattr(report, 'ReportData'):
-                logger.warning("[GeneralDetailReport] No ReportData in response")
-                return []
-            
-            report_data = report.ReportData
-            current_account = None
+        QB only matches whole account names and takes one account filter, so the
+        account name is sent only for an exact match with no account type filter;
+        otherwise the type goes to QB and the name is matched client-side.
+        
+        Returns:
+            Tuple of (QB response, set of filters evaluated by QB: 'account', 'txn_type')
+        """
+        request_set = self.connection.create_request_set()
+        report_query = request_set.AppendGeneralDetailReportQueryRq()
+        pushed_down = set()
+        
+        # Set report type to Transaction Detail by Account
+        report_query.GeneralDetailReportType.SetValue(27)  # Transaction Detail by Account
+        
+        # Apply date filter
+        if date_from or date_to:
+            report_period = report_query.ORReportPeriod.ReportPeriod
+            if date_from:
+                from_date = self._parse_date(date_from)
+                report_period.FromReportDate.SetValue(from_date)
+            if date_to:
+                to_date = self._parse_date(date_to)
+                report_period.ToReportDate.SetValue(to_date)
+        else:
+            # Default to last 90 days if no date specified
+            from datetime import timedelta
+            report_period = report_query.ORReportPeriod.ReportPeriod
+            report_period.ToReportDate.SetValue(datetime.now())
+            report_period.FromReportDate.SetValue(datetime.now() - timedelta(days=90))
+        
+        # Filter by specific account name if provided
+        if account_filter and push_down and account_exact and not account_type_filter:
+            account_or = report_query.ReportAccountFilter.ORReportAccountFilter
+            if include_subaccounts:
+                applied = apply_optional(
+                    'ReportAccountFilter.ORReportAccountFilter.FullNameWithChildren',
+                    lambda: account_or.FullNameWithChildren.SetValue(account_filter))
+            else:
+                applied = apply_optional(
+                    'ReportAccountFilter.ORReportAccountFilter.FullNameList',
+                    lambda: account_or.FullNameList.Add(account_filter))
+            if applied:
+                pushed_down.add('account')
+        if account_type_filter:
+            # Filter by account type - report rows don't carry the type, so QB is the only place it applies
+            if not apply_optional(
+                    'ReportAccountFilter.AccountTypeList',
+                    lambda: report_query.ReportAccountFilter.AccountTypeList.Add(account_type_filter)):
+                logger.warning(f"[GeneralDetailReport] Account type filter '{account_type_filter}' not supported, ignoring it")
+        
+        # Filter by entity if provided  
+        if entity_filter:
+            entity_ref_list = report_query.ReportEntityFilter.EntityRefList
+            entity_ref_list.Add(entity_filter)
+        
+        # Filter by transaction type if provided
+        if txn_type_filter and push_down:
+            if apply_optional(
+                    'ReportTxnTypeFilter.TxnTypeList',
+                    lambda: report_query.ReportTxnTypeFilter.TxnTypeList.Add(txn_type_filter)):
+                pushed_down.add('txn_type')
+        
+        # Note: IncludeSubcolumns not available for GeneralDetailReport
+        # report_query.IncludeSubcolumns.SetValue(True)
+        
+        # Process the request
+        response_set = self.connection.process_request_set(request_set)
+        return response_set.ResponseList.GetAt(0), pushed_down
+    
+    def _parse_report_response(self, report, account_match: Optional[Callable[[str], bool]] = None,
+                               txn_type_lc: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Parse the report response, yielding transactions as their rows are read
+        Rows the account matcher/lowercase txn type filter would reject are skipped unparsed
+        
+        A data row QB can't hand over is skipped and counted (one warning per
+        report); failing to walk the report itself raises, so a cut-short walk
+        never looks like the end of the report.
+        """
+        # Check for ReportData
+        if not hasattr(report, 'ReportData'):
+            logger.warning("[GeneralDetailReport] No ReportData in response")
+            return
+        
+        report_data = report.ReportData
+        current_account = None
+        skip_account = False
+        skipped = 0
+        
+        # Transaction Detail by Account has special structure:
+        # TextRows contain account names
+        # DataRows contain transactions for that account
+        if hasattr(report_data, 'ORReportDataList'):
+            data_list = report_data.ORReportDataList
+            parse_data_row = self._parse_data_row
             
-            # Transaction Detail by Account has special structure:
-            # TextRows contain account names
-            # DataRows contain transactions for that account
-            if hasattr(report_data, 'ORReportDataList'):
-                data_list = report_data.ORReportDataList
-                
-                for i in range(data_list.Count):
-                    data_item = data_list.GetAt(i)
+            try:
+                for data_item in _iter_qb_list(data_list):
                     
                     # Check if this is a TextRow (account name)
-                    if hasattr(data_item, 'TextRow') and data_item.TextRow:
-                        text_row = data_item.TextRow
-                        if hasattr(text_row, 'value') and text_row.value:
+                    text_row = getattr(data_item, 'TextRow', None)
+                    if text_row:
+                        text_value = getattr(text_row, 'value', None)
+                        if text_value:
                             # This is an account name
-                            current_account = text_row.value.GetValue()
+                            current_account = text_value.GetValue()
                             logger.debug(f"[GeneralDetailReport] Found account: {current_account}")
+                            skip_account = bool(account_match and current_account
+                                                and not account_match(current_account.lower()))
+                        continue
+                    
+                    # Rows under an account the account filter rejects are never read
+                    if skip_account:
+                        continue
                     
                     # Check if this is a DataRow (transaction)
-                    elif hasattr(data_item, 'DataRow') and data_item.DataRow:
-                        txn = self._parse_data_row(data_item.DataRow, current_account)
+                    # SubtotalRow and TotalRow items are skipped
+                    data_row = getattr(data_item, 'DataRow', None)
+                    if data_row:
+                        try:
+                            txn = parse_data_row(data_row, current_account, txn_type_lc)
+                        except (AttributeError, pywintypes.com_error):
+                            skipped += 1
+                            continue
                         if txn and txn.get('date'):  # Valid transaction
                             # Add the current account if not already in transaction
                             if current_account and not txn.get('account'):
                                 txn['account'] = current_account
-                            transactions.append(txn)
-                    
-                    # Check for SubtotalRow or TotalRow (skip these)
-                    elif hasattr(data_item, 'SubtotalRow') or hasattr(data_item, 'TotalRow'):
-                        # Skip subtotal and total rows
-                        continue
-            
-            logger.info(f"[GeneralDetailReport] Parsed {len(transactions)} transactions")
-            
-        except Exception as e:
-            logger.error(f"[GeneralDetailReport] Error parsing report: {str(e)}", exc_info=True)
-        
-        return transactions
+                            yield txn
+            finally:
+                # Also runs when the caller stops early at max_returned
+                if skipped:
+                    logger.warning(f"[GeneralDetailReport] Skipped {skipped} unreadable report rows")
     
-    def _parse_data_row(self, data_row, current_account=None) -> Dict:
-        """Parse a DataRow into a transaction dictionary"""
+    def _parse_data_row(self, data_row, current_account=None,
+                        txn_type_lc: Optional[str] = None) -> Optional[Dict]:
+        """
+        Parse a DataRow into a transaction dictionary
+        Returns None as soon as the type column fails the lowercase txn_type_lc filter
+        
+        Raises:
+            AttributeError, pywintypes.com_error: When QuickBooks can't hand over a column
+        """
         txn = {
             'date': None,
             'ref_number': None,
@@ -195,56 +419,22 @@ class GeneralDetailReportRepository:
             'txn_type': None
         }
         
-        try:
-            # Check for ColDataList
-            if hasattr(data_row, 'ColDataList'):
-                col_list = data_row.ColDataList
-                
-                # Parse each column - for Transaction Detail by Account report
-                # The columns are: Type, Date, Name, Clr, Split, Debit, Credit/Balance
-                for col_idx in range(col_list.Count):
-                    col = col_list.GetAt(col_idx)
-                    
-                    if hasattr(col, 'value') and col.value:
-                        value = col.value.GetValue()
-                        
-                        # Map columns for Transaction Detail by Account format
-                        if col_idx == 0:  # Transaction Type
-                            txn['txn_type'] = str(value) if value else None
-                        elif col_idx == 1:  # Date
-                            txn['date'] = str(value) if value else None
-                        elif col_idx == 2:  # Name/Payee
-                            txn['name'] = str(value) if value else None
-                        elif col_idx == 3:  # Cleared Status
-                            txn['cleared'] = str(value) if value else None
-                        elif col_idx == 4:  # Split/Account (the other side of the transaction)
-                            if value:
-                                txn['split_account'] = str(value)
-                        elif col_idx == 5:  # Debit Amount
-                            if value:
-                                try:
-                                    amount_str = str(value).replace('$', '').replace(',', '')
-                                    amount = float(amount_str)
-                                    if amount != 0:
-                                        txn['debit'] = amount
-                                        txn['amount'] = amount
-                                except:
-                                    pass
-                        elif col_idx == 6:  # Credit/Balance (or running balance)
-                            if value:
-                                try:
-                                    amount_str = str(value).replace('$', '').replace(',', '')
-                                    amount = float(amount_str)
-                                    # This might be a credit amount or a running balance
-                                    # If we don't have a debit, this is likely the transaction amount
-                                    if txn.get('debit') is None or txn.get('debit') == 0:
-                                        txn['amount'] = amount
-                                    txn['balance'] = amount
-                                except:
-                                    pass
+        # Check for ColDataList
+        col_list = getattr(data_row, 'ColDataList', None)
+        if col_list is not None:
+            col_get = col_list.GetAt
             
-        except Exception as e:
-            logger.debug(f"[GeneralDetailReport] Error parsing data row: {str(e)}")
+            # Parse each column - for Transaction Detail by Account report
+            # The columns are: Type, Date, Name, Clr, Split, Debit, Credit/Balance
+            # Columns past the handler table are never read
+            for col_idx in range(min(col_list.Count, len(_COL_HANDLERS))):
+                col_value = getattr(col_get(col_idx), 'value', None)
+                if col_value:
+                    _COL_HANDLERS[col_idx](txn, col_value.GetValue())
+                if col_idx == 0 and txn_type_lc and txn['txn_type']:
+                    # Reject before the date/name/money columns are read
+                    if txn['txn_type'].lower().find(txn_type_lc) == -1:
+                        return None
         
         return txn
     
@@ -279,9 +469,9 @@ class GeneralDetailReportRepository:
                         txn['account'] = parts[4].strip()
                     if len(parts) > 5:
                         try:
-                            amount_str = parts[5].strip().replace('$', '').replace(',', '')
+                            amount_str = parts[5].strip().translate(_STRIP_MONEY)
                             txn['amount'] = float(amount_str)
-                        except:
+                        except (ValueError, TypeError):
                             txn['amount'] = 0.0
         
         except Exception as e:
@@ -289,18 +479,17 @@ class GeneralDetailReportRepository:
         
         return txn
     
-    def _apply_filters(self, txn: Dict, 
-                       account_filter: Optional[str],
-                       amount_min: Optional[float],
-                       amount_max: Optional[float],
-                       memo_contains: Optional[str],
-                       txn_type_filter: Optional[str]) -> bool:
-        """Apply additional filters to a transaction"""
-        
-        # Account filter
-        if account_filter and txn.get('account'):
-            if account_filter.lower() not in txn['account'].lower():
-                return False
+    def _apply_filters_prepared(self, txn: Dict,
+                                account_match: Optional[Callable[[str], bool]],
+                                amount_min: Optional[float],
+                                amount_max: Optional[float],
+                                memo_lc: Optional[str],
+                                txn_type_lc: Optional[str]) -> bool:
+        """
+        Apply additional filters to a transaction
+        Text filters must already be lowercase, and account_match takes the lowercased
+        account (see _account_matcher); the numeric checks run first
+        """
         
         # Amount range
         amount = txn.get('amount', 0.0)
@@ -309,14 +498,19 @@ class GeneralDetailReportRepository:
         if amount_max is not None and amount > amount_max:
             return False
         
+        # Account filter
+        if account_match and txn.get('account'):
+            if not account_match(txn['account'].lower()):
+                return False
+        
         # Memo filter
-        if memo_contains and txn.get('memo'):
-            if memo_contains.lower() not in txn['memo'].lower():
+        if memo_lc and txn.get('memo'):
+            if txn['memo'].lower().find(memo_lc) == -1:
                 return False
         
         # Transaction type filter
-        if txn_type_filter and txn.get('txn_type'):
-            if txn_type_filter.lower() not in txn['txn_type'].lower():
+        if txn_type_lc and txn.get('txn_type'):
+            if txn['txn_type'].lower().find(txn_type_lc) == -1:
                 return False
         
         return True
@@ -326,13 +520,9 @@ class GeneralDetailReportRepository:
         if not date_str:
             return datetime.now()
         
-        # Try different formats
-        for fmt in ['%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d']:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except:
-                continue
-        
-        # Default to today if parsing fails
-        logger.warning(f"[GeneralDetailReport] Could not parse date: {date_str}")
-        return datetime.now()
\ No newline at end of file
+        parsed = _parse_date_str(date_str)
+        if parsed is None:
+            # Default to today if parsing fails
+            logger.warning(f"[GeneralDetailReport] Could not parse date: {date_str}")
+            return datetime.now()
+        return parsed
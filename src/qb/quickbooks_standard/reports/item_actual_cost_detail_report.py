@@ -5,9 +5,28 @@ from typing import Dict, List, Optional
 import logging
 from datetime import datetime
 from shared_utilities.fast_qb_connection import fast_qb_connection
+from shared_utilities.qb_capabilities import apply_optional
+from shared_utilities.report_cache import report_cache
 
 logger = logging.getLogger(__name__)
 
+# Deletes currency decorations from QB amount strings in one pass
+_STRIP_MONEY = str.maketrans('', '', '$,')
+
+
+def _to_float(value) -> float:
+    """Convert a QB column value (number or '$1,234.50' style string) to float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).translate(_STRIP_MONEY)) if value else 0.0
+
+
+def _col_value(col):
+    """Value of a report ColData, or "" when the column is empty"""
+    value = getattr(col, 'value', None)
+    return value.GetValue() if value is not None else ""
+
+
 class ItemActualCostDetailReport:
     """Get actual cost transaction details for items"""
     
@@ -28,6 +47,11 @@ class ItemActualCostDetailReport:
         Returns:
             Dictionary with detailed cost transactions
         """
+        cache_key = ('item_actual_cost', item_name, job_name, date_from, date_to)
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             if not self.connection.connect():
                 logger.error("[ItemActualCostDetail] Failed to connect to QuickBooks")
@@ -46,18 +70,20 @@ class ItemActualCostDetailReport:
             transactions = self._query_purchases_by_item_detail(item_name, job_name, date_from, date_to)
             result['transactions'] = transactions
             
-            # Calculate totals
-            for txn in result['transactions']:
-                result['total_cost'] += txn.get('amount', 0)
-                result['total_quantity'] += txn.get('quantity', 0)
+            # Calculate totals - every parsed transaction has amount and quantity
+            result['total_cost'] = sum(txn['amount'] for txn in transactions)
+            result['total_quantity'] = sum(txn['quantity'] for txn in transactions)
             
+            report_cache.set(cache_key, result)
             return result
             
         except Exception as e:
             logger.error(f"[ItemActualCostDetail] Error: {str(e)}")
             return {'status': 'error', 'message': str(e)}
-        finally:
-            self.connection.disconnect()
+    
+    def close(self):
+        """Disconnect from QuickBooks if no other caller is mid-session - for shutdown, not after each report"""
+        self.connection.close_when_idle()
     
     def _query_purchases_by_item_detail(self, item_name: str, job_name: Optional[str],
                                          date_from: Optional[str], date_to: Optional[str]) -> List[Dict]:
@@ -80,19 +106,15 @@ class ItemActualCostDetailReport:
             
             # Add job filter if specified
             if job_name:
-                try:
-                    entity_filter = report_query.ReportEntityFilter.ORReportEntityFilter
-                    entity_filter.FullNameList.Add(job_name)
-                except Exception as e:
-                    logger.warning(f"[ItemActualCostDetail] Could not add job filter: {e}")
+                apply_optional(
+                    'ReportEntityFilter.ORReportEntityFilter.FullNameList',
+                    lambda: report_query.ReportEntityFilter.ORReportEntityFilter.FullNameList.Add(job_name))
             
             # Add item filter if specified
             if item_name:
-                try:
-                    item_filter = report_query.ReportItemFilter.ORReportItemFilter
-                    item_filter.FullNameList.Add(item_name)
-                except Exception as e:
-                    logger.warning(f"[ItemActualCostDetail] Could not add item filter: {e}")
+                apply_optional(
+                    'ReportItemFilter.ORReportItemFilter.FullNameList',
+                    lambda: report_query.ReportItemFilter.ORReportItemFilter.FullNameList.Add(item_name))
             
             report_query.DisplayReport.SetValue(False)
             
@@ -107,8 +129,12 @@ class ItemActualCostDetailReport:
                     if hasattr(report.ReportData, 'ORReportDataList'):
                         current_item = None
                         
-                        for i in range(report.ReportData.ORReportDataList.Count):
-                            row = report.ReportData.ORReportDataList.GetAt(i)
+                        # Bind COM lookups once - each dotted access is a dispatch round-trip
+                        data_list = report.ReportData.ORReportDataList
+                        get_at = data_list.GetAt
+                        
+                        for i in range(data_list.Count):
+                            row = get_at(i)
                             
                             # Track current item from TextRow
                             if hasattr(row, 'TextRow') and row.TextRow:
@@ -119,46 +145,45 @@ class ItemActualCostDetailReport:
                             elif hasattr(row, 'DataRow') and row.DataRow:
                                 dr = row.DataRow
                                 
-                                if hasattr(dr, 'ColDataList') and dr.ColDataList:
-                                    cols = []
-                                    for j in range(dr.ColDataList.Count):
-                                        col = dr.ColDataList.GetAt(j)
-                                        if hasattr(col, 'value'):
-                                            cols.append(col.value.GetValue())
+                                col_list = getattr(dr, 'ColDataList', None)
+                                if col_list:
+                                    # Fixed schema - rows without all 8 columns are not transactions
+                                    if col_list.Count < 8:
+                                        continue
+                                    col_get = col_list.GetAt
+                                    
+                                    # Column structure: Type | Date | Num | Vendor | Job | Qty | Rate | Amount
+                                    txn_type = _col_value(col_get(0))
+                                    date = _col_value(col_get(1))
+                                    ref_number = _col_value(col_get(2))
+                                    vendor = _col_value(col_get(3))
+                                    job = _col_value(col_get(4))
+                                    qty = _col_value(col_get(5))
+                                    rate = _col_value(col_get(6))
+                                    amount = _col_value(col_get(7))
                                     
-                                    if cols and len(cols) >= 8:
-                                        # Column structure: Type | Date | Num | Vendor | Job | Qty | Rate | Amount
-                                        txn_type = cols[0] if len(cols) > 0 else ""
-                                        date = cols[1] if len(cols) > 1 else ""
-                                        ref_number = cols[2] if len(cols) > 2 else ""
-                                        vendor = cols[3] if len(cols) > 3 else ""
-                                        job = cols[4] if len(cols) > 4 else ""
-                                        qty = cols[5] if len(cols) > 5 else ""
-                                        rate = cols[6] if len(cols) > 6 else ""
-                                        amount = cols[7] if len(cols) > 7 else ""
+                                    # Only include rows with actual transaction data
+                                    if txn_type and (amount or qty):
+                                        try:
+                                            qty_float = _to_float(qty)
+                                            rate_float = _to_float(rate)
+                                            amount_float = _to_float(amount)
+                                        except (ValueError, TypeError):
+                                            qty_float = rate_float = amount_float = 0.0
                                         
-                                        # Only include rows with actual transaction data
-                                        if txn_type and (amount or qty):
-                                            try:
-                                                qty_float = float(qty) if qty else 0.0
-                                                rate_float = float(rate) if rate else 0.0
-                                                amount_float = float(amount) if amount else 0.0
-                                            except:
-                                                qty_float = rate_float = amount_float = 0.0
-                                            
-                                            txn = {
-                                                'type': txn_type,
-                                                'date': date,
-                                                'ref_number': ref_number,
-                                                'vendor': vendor,
-                                                'job': job,
-                                                'item': current_item,
-                                                'quantity': qty_float,
-                                                'rate': rate_float,
-                                                'amount': amount_float,
-                                                'description': f"{current_item} - {txn_type} {ref_number}"
-                                            }
-                                            transactions.append(txn)
+                                        txn = {
+                                            'type': txn_type,
+                                            'date': date,
+                                            'ref_number': ref_number,
+                                            'vendor': vendor,
+                                            'job': job,
+                                            'item': current_item,
+                                            'quantity': qty_float,
+                                            'rate': rate_float,
+                                            'amount': amount_float,
+                                            'description': f"{current_item} - {txn_type} {ref_number}"
+                                        }
+                                        transactions.append(txn)
             
         except Exception as e:
             logger.error(f"[ItemActualCostDetail] Error in purchases by item detail report: {e}")
@@ -1,19 +1,107 @@
 """Job Profitability Report Repository
 Uses QuickBooks native JobReportQueryRq with proper parsing
 """
+from array import array
+from collections import namedtuple
 from typing import Dict, List, Optional
 import logging
+import re
 from shared_utilities.fast_qb_connection import fast_qb_connection
+from shared_utilities.qb_capabilities import apply_optional
+from shared_utilities.report_cache import job_report_cache
 
 logger = logging.getLogger(__name__)
 
+# Strips '$' and ',' from a report amount cell in one C-level pass
+_STRIP_MONEY = str.maketrans('', '', '$,')
+_AMOUNT_RE = re.compile(r'-?(?:\d+\.?\d*|\.\d+)')
+
+# dir() on a COM report walks its whole type library - dump it once per process
+_REPORT_ATTRS_DUMPED = False
+
+# JobReportType enumeration:
+# 1 = Item Profitability 
+# 4 = Job Profitability Detail (shows revenue/cost by item)
+# 5 = Job Profitability Summary (shows total revenue/cost)
+JOB_REPORT_TYPE = 4  # JobProfitabilityDetail - shows by item
+
+# Item row columns for JobProfitabilityDetail: [0]=item_code, [1]=cost, [2]=revenue, [3]=net
+# Column 1 is COST, Column 2 is REVENUE (I had them backwards!)
+_COST_COL = 1
+_REVENUE_COL = 2
+_ITEM_ROW_COLS = 4
+
+# (QBFC version, JobReportType) -> parsed ColDescList; the layout is fixed per report type
+_COL_SCHEMA_CACHE: Dict[tuple, List[Dict]] = {}
+
+# One parsed DataRow - a tuple, so no dict is built per row
+ReportRow = namedtuple('ReportRow', 'description columns')
+
+
+def _safe_get(obj, name: str, default=None):
+    """Return obj.<name>.GetValue(), or default when the field is absent/unset
+    
+    One getattr per field instead of hasattr + getattr + GetValue chains -
+    each attribute probe on a COM object is an IDispatch name lookup.
+    """
+    field = getattr(obj, name, None)
+    if field is None:
+        return default
+    get_value = getattr(field, 'GetValue', None)
+    return get_value() if get_value is not None else default
+
+
+def _to_amount(cell) -> float:
+    """Report amount cell -> float; blank, header text and non-strings give 0.0
+    
+    Validates with a regex instead of catching float() errors - most non-item
+    cells are blank or text, and raising per cell is the slow path.
+    """
+    if not isinstance(cell, str):
+        return 0.0
+    clean = cell.translate(_STRIP_MONEY).strip()
+    return float(clean) if clean and _AMOUNT_RE.fullmatch(clean) else 0.0
+
+
+def _to_records(names: List[str], amounts: array) -> List[Dict]:
+    """Materialize parallel name/amount columns into the [{'item', 'amount'}] shape"""
+    return [{'item': name, 'amount': amount} for name, amount in zip(names, amounts)]
+
 class JobProfitabilityReportRepository:
     """Repository for generating job profitability reports"""
     
     def __init__(self):
         self.connection = fast_qb_connection
     
+    @staticmethod
+    def invalidate(job_name: Optional[str] = None):
+        """Drop cached job reports for one job, or all jobs when job_name is None"""
+        if job_name is None:
+            job_report_cache.discard(lambda key: key[0] == 'job_profit')
+        else:
+            job_report_cache.discard(lambda key: key[0] == 'job_profit' and key[1] == job_name)
+    
     def generate_job_report(self, job_name: str) -> Dict:
+        """
+        Generate a profitability report, reusing a result cached in the last 60 seconds
+        
+        Args:
+            job_name: Customer:Job name (e.g., "raised panel door:3408")
+            
+        Returns:
+            Dictionary with job profitability summary data
+        """
+        cache_key = ('job_profit', job_name)
+        cached = job_report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self._generate_job_report(job_name)
+        if result.get('status') == 'success':
+            job_report_cache.set(cache_key, result)
+        return result
+    
+    def _generate_job_report(self, job_name: str) -> Dict:
         """
         Generate a profitability report using JobReportQueryRq
         
@@ -35,31 +123,24 @@ class JobProfitabilityReportRepository:
             request_set = self.connection.create_request_set()
             report_query = request_set.AppendJobReportQueryRq()
             
-            # JobReportType enumeration:
-            # 1 = Item Profitability 
-            # 4 = Job Profitability Detail (shows revenue/cost by item)
-            # 5 = Job Profitability Summary (shows total revenue/cost)
-            report_query.JobReportType.SetValue(4)  # JobProfitabilityDetail - shows by item
+            report_query.JobReportType.SetValue(JOB_REPORT_TYPE)
             
+            # Optional fields vary by QBFC build - support is probed once per process
             # Set ReportDetailLevel to get full transaction details
             # rdlfAll = 0, rdlfAllExceptSummary = 1, rdlfSummaryOnly = 2
-            if hasattr(report_query, 'ReportDetailLevel'):
-                logger.info("[JobProfitabilityReport] Setting ReportDetailLevel to rdlfAll (0)")
-                report_query.ReportDetailLevel.SetValue(0)  # rdlfAll - include all details
-            
-            # Alternative: try ReportDetailLevelFilter if ReportDetailLevel doesn't exist
-            elif hasattr(report_query, 'ReportDetailLevelFilter'):
-                logger.info("[JobProfitabilityReport] Setting ReportDetailLevelFilter to 0 (All)")
-                report_query.ReportDetailLevelFilter.SetValue(0)  # All details
+            if not apply_optional('JobReportQuery.ReportDetailLevel',
+                                  lambda: report_query.ReportDetailLevel.SetValue(0)):
+                # Alternative: try ReportDetailLevelFilter if ReportDetailLevel doesn't exist
+                apply_optional('JobReportQuery.ReportDetailLevelFilter',
+                               lambda: report_query.ReportDetailLevelFilter.SetValue(0))
             
             # Include subcolumns for more info
-            if hasattr(report_query, 'IncludeSubcolumns'):
-                report_query.IncludeSubcolumns.SetValue(True)
+            apply_optional('JobReportQuery.IncludeSubcolumns',
+                           lambda: report_query.IncludeSubcolumns.SetValue(True))
             
             # Set ActiveOnly to false to include all data
-            if hasattr(report_query, 'ActiveOnly'):
-                logger.info("[JobProfitabilityReport] Setting ActiveOnly to False")
-                report_query.ActiveOnly.SetValue(False)
+            apply_optional('JobReportQuery.ActiveOnly',
+                           lambda: report_query.ActiveOnly.SetValue(False))
             
             # Filter for specific job using ReportEntityFilter
             report_query.ReportEntityFilter.ORReportEntityFilter.FullNameList.Add(job_name)
@@ -94,15 +175,14 @@ class JobProfitabilityReportRepository:
     def _parse_job_report(self, response, job_name: str) -> Dict:
         """Parse the QB JobReport response to extract actual data"""
         try:
-            if not hasattr(response, 'Detail') or not response.Detail:
+            report = getattr(response, 'Detail', None)
+            if not report:
                 return {
                     'job_name': job_name,
                     'status': 'error',
                     'error_message': 'No report data in response'
                 }
             
-            report = response.Detail
-            
             # Initialize result structure
             result = {
                 'job_name': job_name,
@@ -112,87 +192,91 @@ class JobProfitabilityReportRepository:
                 'report_structure': {}
             }
             
+            # Column accumulators - item dicts are only built once at the end
+            expense_names: List[str] = []
+            expense_amounts = array('d')
+            income_names: List[str] = []
+            income_amounts = array('d')
+            
             # Log what we have for debugging
-            logger.info(f"[JobProfitabilityReport] Report object attributes: {dir(report)}")
+            global _REPORT_ATTRS_DUMPED
+            if not _REPORT_ATTRS_DUMPED and logger.isEnabledFor(logging.DEBUG):
+                _REPORT_ATTRS_DUMPED = True
+                logger.debug(f"[JobProfitabilityReport] Report object attributes: {dir(report)}")
             
             # Check for ReportTitle
-            if hasattr(report, 'ReportTitle') and report.ReportTitle:
-                result['report_title'] = report.ReportTitle.GetValue()
-                logger.info(f"Report Title: {result['report_title']}")
+            report_title = _safe_get(report, 'ReportTitle')
+            if report_title is not None:
+                result['report_title'] = report_title
+                logger.info("Report Title: %s", report_title)
             
             # Check for ReportSubtitle
-            if hasattr(report, 'ReportSubtitle') and report.ReportSubtitle:
-                result['report_subtitle'] = report.ReportSubtitle.GetValue()
-            
-            # Check for column descriptions
-            if hasattr(report, 'ColDescList') and report.ColDescList:
-                columns = []
-                for i in range(report.ColDescList.Count):
-                    col_desc = report.ColDescList.GetAt(i)
-                    col_info = {}
-                    if hasattr(col_desc, 'ColTitle') and col_desc.ColTitle:
-                        if hasattr(col_desc.ColTitle, 'value'):
-                            col_info['title'] = col_desc.ColTitle.value.GetValue()
-                    if hasattr(col_desc, 'ColType') and col_desc.ColType:
-                        col_info['type'] = col_desc.ColType.GetValue()
-                    columns.append(col_info)
-                result['columns'] = columns
-                logger.info(f"Columns: {columns}")
+            report_subtitle = _safe_get(report, 'ReportSubtitle')
+            if report_subtitle is not None:
+                result['report_subtitle'] = report_subtitle
+            
+            # Check for column descriptions - parsed once per report type
+            schema_key = (self.connection.QBFC_VERSION, JOB_REPORT_TYPE)
+            columns = _COL_SCHEMA_CACHE.get(schema_key)
+            if columns is not None:
+                result['columns'] = [dict(col) for col in columns]
+            else:
+                columns = self._parse_columns(report)
+                if columns is not None:
+                    _COL_SCHEMA_CACHE[schema_key] = columns
+                    result['columns'] = [dict(col) for col in columns]
+                    logger.debug("Columns: %s", columns)
             
             # Parse the actual report data
-            if hasattr(report, 'ReportData') and report.ReportData:
+            report_data = getattr(report, 'ReportData', None)
+            if report_data:
                 logger.info("Found ReportData")
                 
                 # Check what type of report data we have - it's ORReportDataList not ORReportData
-                if hasattr(report.ReportData, 'ORReportDataList'):
-                    logger.info(f"ORReportDataList Count: {report.ReportData.ORReportDataList.Count}")
+                data_list = getattr(report_data, 'ORReportDataList', None)
+                if data_list is not None:
+                    # Bind the COM list accessors once - each '.' is an IDispatch call
+                    row_count = data_list.Count
+                    get_data = data_list.GetAt
+                    logger.info("ORReportDataList Count: %d", row_count)
                     
-                    for i in range(report.ReportData.ORReportDataList.Count):
-                        data = report.ReportData.ORReportDataList.GetAt(i)
+                    for i in range(row_count):
+                        data = get_data(i)
                         
                         # Check for DataRow
-                        if hasattr(data, 'DataRow') and data.DataRow:
-                            row_info = self._parse_report_row(data.DataRow)
-                            if row_info and row_info.get('description'):
+                        data_row = getattr(data, 'DataRow', None)
+                        text_row = None if data_row else getattr(data, 'TextRow', None)
+                        if data_row:
+                            row_info = self._parse_report_row(data_row)
+                            if row_info and row_info.description:
                                 # This is an item row with revenue/cost data
-                                cols = row_info.get('columns', [])
-                                if len(cols) >= 4:  # Columns: [0]=item_code, [1]=cost, [2]=revenue, [3]=net
-                                    item_name = row_info['description']
-                                    
-                                    # Column 1 is COST, Column 2 is REVENUE (I had them backwards!)
-                                    try:
-                                        cost = float(cols[1].replace('$', '').replace(',', '').strip() or '0')
-                                        if cost > 0:
-                                            result['expenses']['items'].append({
-                                                'item': item_name,
-                                                'amount': cost
-                                            })
-                                            result['expenses']['total'] += cost
-                                    except:
-                                        pass
+                                item_name, cols = row_info
+                                if len(cols) >= _ITEM_ROW_COLS:
+                                    cost = _to_amount(cols[_COST_COL])
+                                    if cost > 0:
+                                        expense_names.append(item_name)
+                                        expense_amounts.append(cost)
                                     
-                                    try:
-                                        revenue = float(cols[2].replace('$', '').replace(',', '').strip() or '0')
-                                        if revenue > 0:
-                                            result['income']['items'].append({
-                                                'item': item_name,
-                                                'amount': revenue
-                                            })
-                                            result['income']['total'] += revenue
-                                    except:
-                                        pass
+                                    revenue = _to_amount(cols[_REVENUE_COL])
+                                    if revenue > 0:
+                                        income_names.append(item_name)
+                                        income_amounts.append(revenue)
                         
                         # Check for TextRow (headers/subtotals)
-                        elif hasattr(data, 'TextRow') and data.TextRow:
-                            if hasattr(data.TextRow, 'value'):
-                                text = data.TextRow.value.GetValue()
-                                logger.info(f"TextRow: {text}")
+                        elif text_row:
+                            text = _safe_get(text_row, 'value')
+                            if text is not None:
+                                logger.debug("TextRow: %s", text)
                 
                 # Alternative structure
-                elif hasattr(report.ReportData, 'DataRow'):
+                elif getattr(report_data, 'DataRow', None) is not None:
                     logger.info("Found direct DataRow")
                     # Handle single row or different structure
             
+            # Only positive amounts were collected, so the column sums are the totals
+            result['expenses'] = {'total': sum(expense_amounts), 'items': _to_records(expense_names, expense_amounts)}
+            result['income'] = {'total': sum(income_amounts), 'items': _to_records(income_names, income_amounts)}
+            
             # Calculate profit/loss
             result['profit_loss'] = result['income']['total'] - result['expenses']['total']
             if result['income']['total'] > 0:
@@ -201,47 +285,59 @@ class JobProfitabilityReportRepository:
                 result['profit_margin'] = 0
             
             # Log summary
-            logger.info(f"Income Total: ${result['income']['total']:.2f}")
-            logger.info(f"Expense Total: ${result['expenses']['total']:.2f}")
-            logger.info(f"Profit/Loss: ${result['profit_loss']:.2f}")
+            logger.info("Income Total: $%.2f", result['income']['total'])
+            logger.info("Expense Total: $%.2f", result['expenses']['total'])
+            logger.info("Profit/Loss: $%.2f", result['profit_loss'])
             
             return result
             
         except Exception as e:
-            logger.error(f"[JobProfitabilityReport] Error parsing report: {str(e)}", exc_info=True)
+            logger.error("[JobProfitabilityReport] Error parsing report: %s", e, exc_info=True)
             return {
                 'job_name': job_name,
                 'status': 'error',
                 'error_message': f'Error parsing report: {str(e)}'
             }
     
-    def _parse_report_row(self, row) -> Optional[Dict]:
-        """Parse a single DataRow from the report"""
+    def _parse_columns(self, report) -> Optional[List[Dict]]:
+        """Parse the report's ColDescList into [{'title', 'type'}], or None if absent"""
+        col_desc_list = getattr(report, 'ColDescList', None)
+        if not col_desc_list:
+            return None
+        columns = []
+        get_col_desc = col_desc_list.GetAt
+        for i in range(col_desc_list.Count):
+            col_desc = get_col_desc(i)
+            col_info = {}
+            title = _safe_get(getattr(col_desc, 'ColTitle', None), 'value')
+            if title is not None:
+                col_info['title'] = title
+            col_type = _safe_get(col_desc, 'ColType')
+            if col_type is not None:
+                col_info['type'] = col_type
+            columns.append(col_info)
+        return columns
+    
+    def _parse_report_row(self, row) -> Optional[ReportRow]:
+        """Parse a single DataRow from the report into ReportRow(description, columns)"""
         try:
-            row_data = {}
-            
             # Get row data/description
-            if hasattr(row, 'RowData') and row.RowData:
-                if hasattr(row.RowData, 'value'):
-                    row_data['description'] = row.RowData.value.GetValue()
+            description = _safe_get(getattr(row, 'RowData', None), 'value')
             
             # Get column data - use ColDataList not ColData
-            if hasattr(row, 'ColDataList') and row.ColDataList:
-                cols = []
-                for i in range(row.ColDataList.Count):
-                    col = row.ColDataList.GetAt(i)
-                    if hasattr(col, 'value'):
-                        val = col.value.GetValue()
+            cols = []
+            col_data_list = getattr(row, 'ColDataList', None)
+            if col_data_list:
+                get_col = col_data_list.GetAt
+                for i in range(col_data_list.Count):
+                    val = _safe_get(get_col(i), 'value')
+                    if val is not None:
                         cols.append(val)
-                        
-                
-                row_data['columns'] = cols
-            
             
-            return row_data if row_data.get('description') or row_data.get('columns') else None
+            return ReportRow(description, cols) if description or cols else None
             
         except Exception as e:
-            logger.error(f"Error parsing row: {e}")
+            logger.error("Error parsing row: %s", e)
             return None
     
     def _empty_report(self, job_name: str) -> Dict:
@@ -1,22 +1,130 @@
 """Job Transaction Detail Report - Gets actual transaction details for a job
 Since JobReportQueryRq doesn't return transaction details, this queries transactions directly
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
+import sys
 from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
 from shared_utilities.fast_qb_connection import fast_qb_connection
+from shared_utilities.report_cache import job_invoice_cache, job_report_cache, report_cache
 
 logger = logging.getLogger(__name__)
 
+# Only the Ret elements the parsers read - QB serializes nothing else
+INVOICE_RET_ELEMENTS = ('TxnID', 'CustomerRef', 'RefNumber', 'TxnDate', 'Subtotal', 'Memo')
+BILL_RET_ELEMENTS = ('TxnID', 'RefNumber', 'TxnDate', 'VendorRef', 'AmountDue', 'Memo', 'ItemLineRet')
+CHECK_RET_ELEMENTS = ('TxnID', 'RefNumber', 'TxnDate', 'PayeeEntityRef', 'Amount', 'Memo',
+                      'ItemLineRet', 'ExpenseLineRet')
+
+
+def _ret_elements_xml(elements) -> str:
+    return ''.join(f'<IncludeRetElementList>{element}</IncludeRetElementList>' for element in elements)
+
+
+# QBXML request templates - only the filters are filled in per call.
+# Element order follows the QBXML schema for each *QueryRq.
+_INVOICE_QUERY_XML = ('<InvoiceQueryRq>{date_filter}{entity_filter}'
+                      + _ret_elements_xml(INVOICE_RET_ELEMENTS) + '</InvoiceQueryRq>')
+# Invoices deleted since the last fetch - paired with the modified-since invoice delta
+_INVOICE_DELETED_QUERY_XML = ('<TxnDeletedQueryRq><TxnDelType>Invoice</TxnDelType>'
+                              '<DeletedDateRangeFilter><FromDeletedDate>{deleted_since:%Y-%m-%dT%H:%M:%S}'
+                              '</FromDeletedDate></DeletedDateRangeFilter></TxnDeletedQueryRq>')
+_BILL_QUERY_XML = ('<BillQueryRq>{selector}<IncludeLineItems>true</IncludeLineItems>'
+                   + _ret_elements_xml(BILL_RET_ELEMENTS) + '</BillQueryRq>')
+_CHECK_QUERY_XML = ('<CheckQueryRq>{selector}<IncludeLineItems>true</IncludeLineItems>'
+                    + _ret_elements_xml(CHECK_RET_ELEMENTS) + '</CheckQueryRq>')
+
+# Line-level detail so bills/checks whose *lines* reference the job match the entity filter
+_JOB_TXN_LOOKUP_XML = ('<TransactionQueryRq>{date_filter}'
+                       '<TransactionEntityFilter><FullName>{job_name}</FullName></TransactionEntityFilter>'
+                       '<TransactionTypeFilter><TxnTypeFilter>{txn_type}</TxnTypeFilter></TransactionTypeFilter>'
+                       '<TransactionDetailLevelFilter>All</TransactionDetailLevelFilter>'
+                       '<IncludeRetElementList>TxnID</IncludeRetElementList></TransactionQueryRq>')
+
+
+def _transaction_date_filter_xml(date_from: Optional[str], date_to: Optional[str]) -> str:
+    """TransactionDateRangeFilter element for MM-DD-YYYY dates, or '' for no filter"""
+    txn_filter = _txn_date_filter_xml(date_from, date_to)
+    return txn_filter.replace('TxnDateRangeFilter>', 'TransactionDateRangeFilter>')
+
+
+def _txn_date_filter_xml(date_from: Optional[str], date_to: Optional[str]) -> str:
+    """TxnDateRangeFilter element for MM-DD-YYYY dates, or '' for no filter"""
+    if not (date_from or date_to):
+        return ''
+    xml = '<TxnDateRangeFilter>'
+    if date_from:
+        xml += f"<FromTxnDate>{datetime.strptime(date_from, '%m-%d-%Y'):%Y-%m-%d}</FromTxnDate>"
+    if date_to:
+        xml += f"<ToTxnDate>{datetime.strptime(date_to, '%m-%d-%Y'):%Y-%m-%d}</ToTxnDate>"
+    return xml + '</TxnDateRangeFilter>'
+
+
+def _txn_selector_xml(txn_ids: Optional[tuple], date_from: Optional[str], date_to: Optional[str]) -> str:
+    """TxnID list when txn_ids is given, else the date range filter"""
+    if txn_ids:
+        return ''.join(f'<TxnID>{escape(txn_id)}</TxnID>' for txn_id in txn_ids)
+    return _txn_date_filter_xml(date_from, date_to)
+
+
+def _safe_get(obj, name: str, default=None):
+    """Return obj.<name>.GetValue(), or default when the field is absent/unset
+    
+    One getattr per field instead of hasattr + getattr + GetValue chains -
+    each attribute probe on a COM object is an IDispatch name lookup.
+    """
+    field = getattr(obj, name, None)
+    if field is None:
+        return default
+    get_value = getattr(field, 'GetValue', None)
+    return get_value() if get_value is not None else default
+
+
+def _in_date_range(value, date_from: Optional[str], date_to: Optional[str]) -> bool:
+    """Whether a QB TxnDate value falls within MM-DD-YYYY date_from/date_to"""
+    if value is None:
+        return False
+    txn_date = value.date() if isinstance(value, datetime) else value
+    if date_from and txn_date < datetime.strptime(date_from, '%m-%d-%Y').date():
+        return False
+    if date_to and txn_date > datetime.strptime(date_to, '%m-%d-%Y').date():
+        return False
+    return True
+
+
+def _status_ok(response) -> bool:
+    """Whether a query response is complete - status 0, or 1 for no matching objects"""
+    return response is not None and response.StatusCode in (0, 1)
+
+
+def _line_customer(line) -> Optional[str]:
+    """Customer:Job full name on an item/expense line, or None
+    
+    Interned, so comparing against an interned job name is an identity check
+    and repeated names share one string in the job index.
+    """
+    name = _safe_get(getattr(line, 'CustomerRef', None), 'FullName')
+    return sys.intern(name) if name else name
+
 class JobTransactionDetailReport:
     """Get transaction-level details for a job by querying transactions directly"""
     
     def __init__(self):
         self.connection = fast_qb_connection
     
+    @staticmethod
+    def invalidate(job_name: Optional[str] = None):
+        """Drop cached job transactions for one job, or all jobs when job_name is None"""
+        if job_name is None:
+            job_report_cache.discard(lambda key: key[0] == 'job_transactions')
+        else:
+            job_report_cache.discard(lambda key: key[0] == 'job_transactions' and key[1] == job_name)
+    
     def get_job_transactions(self, job_name: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict:
         """
         Get all transactions for a job with full details
+        Results are cached for 60 seconds per (job_name, date_from, date_to)
         
         Args:
             job_name: Customer:Job name (e.g., "raised panel door:3408")
@@ -26,6 +134,18 @@ class JobTransactionDetailReport:
         Returns:
             Dictionary with detailed transaction data
         """
+        cache_key = ('job_transactions', job_name, date_from, date_to)
+        cached = job_report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self._get_job_transactions(job_name, date_from, date_to)
+        if result.get('status') == 'success':
+            job_report_cache.set(cache_key, result)
+        return result
+    
+    def _get_job_transactions(self, job_name: str, date_from: Optional[str], date_to: Optional[str]) -> Dict:
+        """Query QuickBooks for the job's transactions, bypassing the cache"""
         try:
             if not self.connection.connect():
                 logger.error("[JobTransactionDetail] Failed to connect to QuickBooks")
@@ -49,27 +169,74 @@ class JobTransactionDetailReport:
                 'transaction_count': 0
             }
             
-            # Query Invoices for this job
-            invoices = self._query_invoices(job_name, date_from, date_to)
+            # Customer:Job -> (bill TxnIDs, check TxnIDs) for this date range, if a
+            # recent sweep built one; otherwise look the job's TxnIDs up with a
+            # TransactionQuery, and only sweep all bills/checks if that fails
+            index_key = ('job_txn_index', date_from, date_to)
+            job_index = report_cache.get(index_key)
+            sweep_index = None
+            if job_index is not None:
+                txn_ids = job_index.get(job_name, ((), ()))
+            else:
+                txn_ids = self._fast_find_txns_for_job(job_name, date_from, date_to)
+                if txn_ids is None:
+                    sweep_index = {}
+            
+            # Invoices fetched earlier for this job/range - only fetch what changed since
+            invoice_key = ('job_invoices', job_name, date_from, date_to)
+            prior_invoices = job_invoice_cache.get(invoice_key)
+            modified_since = prior_invoices[1] if prior_invoices else None
+            # Overlap a minute so edits saved while the last fetch ran aren't missed
+            fetch_started = datetime.now() - timedelta(minutes=1)
+            
+            responses = self._process_queries(job_name, date_from, date_to, txn_ids, modified_since)
+            
+            # Invoices for this job
+            invoice_response = responses[0]
+            if prior_invoices:
+                # The delta covers every customer, so invoices moved to another
+                # job are seen too; deleted ones come from the TxnDeletedQuery
+                if _status_ok(invoice_response) and _status_ok(responses[3]):
+                    moved_ids = set()
+                    changed = self._parse_invoices(invoice_response, job_name, moved_ids)
+                    gone_ids = moved_ids | self._parse_deleted_txn_ids(responses[3])
+                    invoices = self._merge_invoices(prior_invoices[0], changed, date_from, date_to, gone_ids)
+                else:
+                    # An incomplete delta can't be merged - fetch the job's invoices afresh
+                    logger.warning("[JobTransactionDetail] Invoice delta failed, refetching all invoices for the job")
+                    invoice_response = self.connection.process_qbxml(
+                        self._invoice_query_xml(job_name, date_from, date_to)).ResponseList.GetAt(0)
+                    invoices = self._parse_invoices(invoice_response)
+            else:
+                invoices = self._parse_invoices(invoice_response)
+            if _status_ok(invoice_response):
+                job_invoice_cache.set(invoice_key, (invoices, fetch_started))
             result['income']['invoices'] = invoices
             for inv in invoices:
                 result['income']['total'] += inv.get('amount', 0)
                 result['transaction_count'] += 1
             
-            # Query Bills with job line items
-            bills = self._query_bills_for_job(job_name, date_from, date_to)
+            # Bills with job line items
+            bills = self._parse_bills_for_job(responses[1], job_name, sweep_index)
             result['expenses']['bills'] = bills
             for bill in bills:
                 result['expenses']['total'] += bill.get('job_amount', 0)
                 result['transaction_count'] += 1
             
-            # Query Checks with job line items  
-            checks = self._query_checks_for_job(job_name, date_from, date_to)
+            # Checks with job line items  
+            checks = self._parse_checks_for_job(responses[2], job_name, sweep_index)
             result['expenses']['checks'] = checks
             for check in checks:
                 result['expenses']['total'] += check.get('job_amount', 0)
                 result['transaction_count'] += 1
             
+            # Status 1 is "no matching objects" - an empty sweep is still a complete one
+            if sweep_index is not None and all(_status_ok(r) for r in responses[1:3]):
+                report_cache.set(index_key, {
+                    name: (tuple(ids['bills']), tuple(ids['checks']))
+                    for name, ids in sweep_index.items()
+                })
+            
             # Calculate profit/loss
             result['profit_loss'] = result['income']['total'] - result['expenses']['total']
             if result['income']['total'] > 0:
@@ -82,47 +249,134 @@ class JobTransactionDetailReport:
         except Exception as e:
             logger.error(f"[JobTransactionDetail] Error: {str(e)}")
             return {'status': 'error', 'message': str(e)}
-        finally:
-            self.connection.disconnect()
     
-    def _query_invoices(self, job_name: str, date_from: Optional[str], date_to: Optional[str]) -> List[Dict]:
-        """Query invoices for the job"""
+    def close(self):
+        """Disconnect from QuickBooks if no other caller is mid-session - for shutdown, not after each report"""
+        self.connection.close_when_idle()
+    
+    def _process_queries(self, job_name: str, date_from: Optional[str], date_to: Optional[str],
+                         txn_ids: Optional[Tuple[tuple, tuple]] = None,
+                         invoices_modified_since: Optional[datetime] = None) -> List:
+        """Run the invoice, bill, check and deleted-invoice queries and return their four responses
+        
+        Tries one batched QBXML message first (one QB round-trip). Some QB installs
+        reject mixed query types in one message set; in that case each query is
+        sent in its own message on the same session.
+        
+        Args:
+            txn_ids: Known (bill TxnIDs, check TxnIDs) for the job from the job index.
+                None sweeps every bill/check in the date range. An empty ID tuple
+                skips that query and its response slot is None.
+            invoices_modified_since: Fetch only invoices modified since this time (for
+                every customer), plus the invoices deleted since then. Without it the
+                deleted-invoice slot is None.
+        """
+        bill_ids, check_ids = txn_ids if txn_ids is not None else (None, None)
+        queries = [
+            self._invoice_query_xml(job_name, date_from, date_to, invoices_modified_since),
+            None if bill_ids == () else _BILL_QUERY_XML.format(selector=_txn_selector_xml(bill_ids, date_from, date_to)),
+            None if check_ids == () else _CHECK_QUERY_XML.format(selector=_txn_selector_xml(check_ids, date_from, date_to)),
+            _INVOICE_DELETED_QUERY_XML.format(deleted_since=invoices_modified_since) if invoices_modified_since else None,
+        ]
+        active = [query for query in queries if query is not None]
+        
+        try:
+            # continueOnError - keep going if one query fails
+            response_list = self.connection.process_qbxml(''.join(active), on_error='continueOnError').ResponseList
+            active_responses = [response_list.GetAt(i) for i in range(len(active))]
+        except Exception as e:
+            logger.warning(f"[JobTransactionDetail] Batched query failed, running queries one at a time: {e}")
+            active_responses = [
+                self.connection.process_qbxml(query).ResponseList.GetAt(0)
+                for query in active
+            ]
+        
+        # Put None back in the slots of skipped queries
+        responses = iter(active_responses)
+        return [next(responses) if query is not None else None for query in queries]
+    
+    def _fast_find_txns_for_job(self, job_name: str, date_from: Optional[str],
+                                date_to: Optional[str]) -> Optional[Tuple[tuple, tuple]]:
+        """TxnIDs of bills and checks with lines for the job, via TransactionQueryRq
+        
+        Lets the bill/check queries hydrate just those transactions instead of
+        scanning every bill and check in the date range.
+        
+        Returns:
+            (bill TxnIDs, check TxnIDs), or None if the lookup failed
+        """
+        date_filter = _transaction_date_filter_xml(date_from, date_to)
+        queries = ''.join(
+            _JOB_TXN_LOOKUP_XML.format(date_filter=date_filter, job_name=escape(job_name), txn_type=txn_type)
+            for txn_type in ('Bill', 'Check')
+        )
+        try:
+            response_list = self.connection.process_qbxml(queries, on_error='continueOnError').ResponseList
+            found = []
+            for i in range(2):
+                response = response_list.GetAt(i)
+                if response.StatusCode not in (0, 1):  # 1 = no matching transactions
+                    logger.warning(f"[JobTransactionDetail] Transaction lookup failed: {response.StatusMessage}")
+                    return None
+                txn_ids = set()
+                txn_list = response.Detail if response.StatusCode == 0 else None
+                if txn_list is not None:
+                    get_txn = txn_list.GetAt
+                    for j in range(txn_list.Count):
+                        txn_id = _safe_get(get_txn(j), 'TxnID')
+                        if txn_id:
+                            txn_ids.add(txn_id)
+                found.append(tuple(txn_ids))
+            return found[0], found[1]
+        except Exception as e:
+            logger.warning(f"[JobTransactionDetail] Transaction lookup failed: {e}")
+            return None
+    
+    @staticmethod
+    def _invoice_query_xml(job_name: str, date_from: Optional[str], date_to: Optional[str],
+                           modified_since: Optional[datetime] = None) -> str:
+        """InvoiceQueryRq for the job
+        
+        With modified_since, the modified-date filter replaces the transaction date
+        filter (QB accepts only one of the two) and the job filter is dropped, so
+        invoices moved to another customer:job show up too - callers filter by
+        TxnDate and CustomerRef themselves.
+        """
+        if modified_since:
+            date_filter = (f"<ModifiedDateRangeFilter><FromModifiedDate>{modified_since:%Y-%m-%dT%H:%M:%S}"
+                           "</FromModifiedDate></ModifiedDateRangeFilter>")
+            entity_filter = ''
+        else:
+            date_filter = _txn_date_filter_xml(date_from, date_to)
+            entity_filter = f'<EntityFilter><FullName>{escape(job_name)}</FullName></EntityFilter>'
+        return _INVOICE_QUERY_XML.format(date_filter=date_filter, entity_filter=entity_filter)
+    
+    def _parse_invoices(self, response, job_name: Optional[str] = None,
+                        other_job_ids: Optional[set] = None) -> List[Dict]:
+        """Parse the invoice query response
+        
+        When job_name is given (an unfiltered delta), invoices for any other
+        customer:job are left out and their TxnIDs added to other_job_ids.
+        """
         invoices = []
+        job_key = job_name.casefold() if job_name else None
         try:
-            request_set = self.connection.create_request_set()
-            invoice_query = request_set.AppendInvoiceQueryRq()
-            
-            # Filter by customer/job - correct structure
-            invoice_query.ORInvoiceQuery.InvoiceFilter.EntityFilter.OREntityFilter.FullNameList.Add(job_name)
-            
-            # Add date filter if provided
-            if date_from or date_to:
-                import pywintypes
-                from datetime import datetime
-                date_filter = invoice_query.ORInvoiceQuery.InvoiceFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
-                if date_from:
-                    # Convert string to pywintypes.Time
-                    dt = datetime.strptime(date_from, '%m-%d-%Y')
-                    date_filter.FromTxnDate.SetValue(pywintypes.Time(dt))
-                if date_to:
-                    dt = datetime.strptime(date_to, '%m-%d-%Y')
-                    date_filter.ToTxnDate.SetValue(pywintypes.Time(dt))
-            
-            invoice_query.IncludeLineItems.SetValue(True)
-            
-            response_set = self.connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-            
-            if response.StatusCode == 0 and response.Detail and response.Detail.Count > 0:
+            if response is not None and response.StatusCode == 0 and response.Detail and response.Detail.Count > 0:
                 for i in range(response.Detail.Count):
                     inv = response.Detail.GetAt(i)
+                    if job_key is not None:
+                        customer = _safe_get(getattr(inv, 'CustomerRef', None), 'FullName')
+                        if not customer or customer.casefold() != job_key:
+                            if other_job_ids is not None:
+                                other_job_ids.add(_safe_get(inv, 'TxnID'))
+                            continue
                     invoices.append({
                         'type': 'Invoice',
-                        'txn_id': inv.TxnID.GetValue() if hasattr(inv, 'TxnID') else None,
-                        'ref_number': inv.RefNumber.GetValue() if hasattr(inv, 'RefNumber') else None,
-                        'date': inv.TxnDate.GetValue() if hasattr(inv, 'TxnDate') else None,
-                        'amount': float(inv.Subtotal.GetValue()) if hasattr(inv, 'Subtotal') else 0,
-                        'memo': inv.Memo.GetValue() if hasattr(inv, 'Memo') and inv.Memo else ''
+                        'txn_id': _safe_get(inv, 'TxnID'),
+                        'ref_number': _safe_get(inv, 'RefNumber'),
+                        'date': _safe_get(inv, 'TxnDate'),
+                        'amount': float(_safe_get(inv, 'Subtotal', 0)),
+                        'memo': _safe_get(inv, 'Memo', '')
                     })
                     
         except Exception as e:
@@ -130,61 +384,77 @@ class JobTransactionDetailReport:
         
         return invoices
     
-    def _query_bills_for_job(self, job_name: str, date_from: Optional[str], date_to: Optional[str]) -> List[Dict]:
-        """Query bills that have line items for this job"""
+    @staticmethod
+    def _parse_deleted_txn_ids(response) -> set:
+        """TxnIDs from a TxnDeletedQuery response (status 1 - nothing deleted - gives none)"""
+        txn_ids = set()
+        if response is not None and response.StatusCode == 0 and response.Detail is not None:
+            deleted = response.Detail
+            for i in range(deleted.Count):
+                txn_id = _safe_get(deleted.GetAt(i), 'TxnID')
+                if txn_id:
+                    txn_ids.add(txn_id)
+        return txn_ids
+    
+    @staticmethod
+    def _merge_invoices(prior: List[Dict], changed: List[Dict], date_from: Optional[str],
+                        date_to: Optional[str], gone_ids: frozenset = frozenset()) -> List[Dict]:
+        """Merge invoices modified since the last fetch into the prior list, by TxnID
+        
+        gone_ids are invoices deleted or moved to another job since then - dropped.
+        """
+        merged = {inv['txn_id']: inv for inv in prior if inv['txn_id'] not in gone_ids}
+        for inv in changed:
+            if _in_date_range(inv.get('date'), date_from, date_to):
+                merged[inv['txn_id']] = inv
+            else:
+                # Re-dated out of the range since the last fetch
+                merged.pop(inv['txn_id'], None)
+        return list(merged.values())
+    
+    def _parse_bills_for_job(self, response, job_name: str, job_index: Optional[Dict] = None) -> List[Dict]:
+        """Parse the bill query response, keeping bills that have line items for this job
+        
+        When job_index is given, every bill's TxnID is also recorded under each
+        Customer:Job its lines reference.
+        """
         bills = []
+        job_name = sys.intern(job_name)
         try:
-            request_set = self.connection.create_request_set()
-            bill_query = request_set.AppendBillQueryRq()
-            
-            # Can't filter bills by job directly, need to get all and filter
-            if date_from or date_to:
-                import pywintypes
-                from datetime import datetime
-                if date_from:
-                    dt = datetime.strptime(date_from, '%m-%d-%Y')
-                    bill_query.ORBillQuery.BillFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter.FromTxnDate.SetValue(pywintypes.Time(dt))
-                if date_to:
-                    dt = datetime.strptime(date_to, '%m-%d-%Y')
-                    bill_query.ORBillQuery.BillFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter.ToTxnDate.SetValue(pywintypes.Time(dt))
-            
-            bill_query.IncludeLineItems.SetValue(True)
-            
-            response_set = self.connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-
-            if response.StatusCode == 0:
+            if response is not None and response.StatusCode == 0:
                 bill_list = response.Detail
                 if bill_list is not None and hasattr(bill_list, 'Count'):
                     for i in range(bill_list.Count):
                         bill = bill_list.GetAt(i)
+                        txn_id = _safe_get(bill, 'TxnID')
 
                         # Check if any line items are for this job
                         job_amount = 0.0
                         has_job = False
 
-                        if hasattr(bill, 'ORItemLineRetList'):
-                            for j in range(bill.ORItemLineRetList.Count):
-                                line = bill.ORItemLineRetList.GetAt(j)
-                                if hasattr(line, 'ItemLineRet') and line.ItemLineRet:
-                                    item_line = line.ItemLineRet
-                                    if hasattr(item_line, 'CustomerRef') and item_line.CustomerRef:
-                                        if hasattr(item_line.CustomerRef, 'FullName'):
-                                            if item_line.CustomerRef.FullName.GetValue() == job_name:
-                                                has_job = True
-                                                if hasattr(item_line, 'Amount'):
-                                                    job_amount += float(item_line.Amount.GetValue())
+                        item_lines = getattr(bill, 'ORItemLineRetList', None)
+                        if item_lines is not None:
+                            for j in range(item_lines.Count):
+                                item_line = getattr(item_lines.GetAt(j), 'ItemLineRet', None)
+                                if not item_line:
+                                    continue
+                                customer = _line_customer(item_line)
+                                if job_index is not None and customer:
+                                    self._index_txn(job_index, customer, 'bills', txn_id)
+                                if customer == job_name:
+                                    has_job = True
+                                    job_amount += float(_safe_get(item_line, 'Amount', 0))
 
                         if has_job:
                             bills.append({
                                 'type': 'Bill',
-                                'txn_id': bill.TxnID.GetValue() if hasattr(bill, 'TxnID') else None,
-                                'ref_number': bill.RefNumber.GetValue() if hasattr(bill, 'RefNumber') else None,
-                                'date': bill.TxnDate.GetValue() if hasattr(bill, 'TxnDate') else None,
-                                'vendor': bill.VendorRef.FullName.GetValue() if hasattr(bill, 'VendorRef') else None,
+                                'txn_id': txn_id,
+                                'ref_number': _safe_get(bill, 'RefNumber'),
+                                'date': _safe_get(bill, 'TxnDate'),
+                                'vendor': _safe_get(getattr(bill, 'VendorRef', None), 'FullName'),
                                 'job_amount': job_amount,
-                                'total_amount': float(bill.AmountDue.GetValue()) if hasattr(bill, 'AmountDue') else 0,
-                                'memo': bill.Memo.GetValue() if hasattr(bill, 'Memo') and bill.Memo else ''
+                                'total_amount': float(_safe_get(bill, 'AmountDue', 0)),
+                                'memo': _safe_get(bill, 'Memo', '')
                             })
                     
         except Exception as e:
@@ -192,77 +462,71 @@ class JobTransactionDetailReport:
         
         return bills
     
-    def _query_checks_for_job(self, job_name: str, date_from: Optional[str], date_to: Optional[str]) -> List[Dict]:
-        """Query checks that have line items for this job"""
+    def _parse_checks_for_job(self, response, job_name: str, job_index: Optional[Dict] = None) -> List[Dict]:
+        """Parse the check query response, keeping checks that have line items for this job
+        
+        When job_index is given, every check's TxnID is also recorded under each
+        Customer:Job its lines reference.
+        """
         checks = []
+        job_name = sys.intern(job_name)
         try:
-            request_set = self.connection.create_request_set()
-            check_query = request_set.AppendCheckQueryRq()
-            
-            # Can't filter checks by job directly, need to get all and filter
-            if date_from or date_to:
-                import pywintypes
-                from datetime import datetime
-                # Check query structure is different - doesn't use ORCheckQuery wrapper
-                if date_from:
-                    dt = datetime.strptime(date_from, '%m-%d-%Y')
-                    check_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter.FromTxnDate.SetValue(pywintypes.Time(dt))
-                if date_to:
-                    dt = datetime.strptime(date_to, '%m-%d-%Y')
-                    check_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter.ToTxnDate.SetValue(pywintypes.Time(dt))
-            
-            check_query.IncludeLineItems.SetValue(True)
-            
-            response_set = self.connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-
-            if response.StatusCode == 0:
+            if response is not None and response.StatusCode == 0:
                 check_list = response.Detail
                 if check_list is not None and hasattr(check_list, 'Count'):
                     for i in range(check_list.Count):
                         check = check_list.GetAt(i)
-                    
-                    # Check if any line items are for this job
-                    job_amount = 0.0
-                    has_job = False
-                    
-                    # Check item lines
-                    if hasattr(check, 'ORItemLineRetList'):
-                        for j in range(check.ORItemLineRetList.Count):
-                            line = check.ORItemLineRetList.GetAt(j)
-                            if hasattr(line, 'ItemLineRet') and line.ItemLineRet:
-                                item_line = line.ItemLineRet
-                                if hasattr(item_line, 'CustomerRef') and item_line.CustomerRef:
-                                    if hasattr(item_line.CustomerRef, 'FullName'):
-                                        if item_line.CustomerRef.FullName.GetValue() == job_name:
-                                            has_job = True
-                                            if hasattr(item_line, 'Amount'):
-                                                job_amount += float(item_line.Amount.GetValue())
-                    
-                    # Check expense lines
-                    if hasattr(check, 'ExpenseLineRetList'):
-                        for j in range(check.ExpenseLineRetList.Count):
-                            exp_line = check.ExpenseLineRetList.GetAt(j)
-                            if hasattr(exp_line, 'CustomerRef') and exp_line.CustomerRef:
-                                if hasattr(exp_line.CustomerRef, 'FullName'):
-                                    if exp_line.CustomerRef.FullName.GetValue() == job_name:
-                                        has_job = True
-                                        if hasattr(exp_line, 'Amount'):
-                                            job_amount += float(exp_line.Amount.GetValue())
-                    
-                    if has_job:
-                        checks.append({
-                            'type': 'Check',
-                            'txn_id': check.TxnID.GetValue() if hasattr(check, 'TxnID') else None,
-                            'ref_number': check.RefNumber.GetValue() if hasattr(check, 'RefNumber') else None,
-                            'date': check.TxnDate.GetValue() if hasattr(check, 'TxnDate') else None,
-                            'payee': check.PayeeEntityRef.FullName.GetValue() if hasattr(check, 'PayeeEntityRef') else None,
-                            'job_amount': job_amount,
-                            'total_amount': float(check.Amount.GetValue()) if hasattr(check, 'Amount') else 0,
-                            'memo': check.Memo.GetValue() if hasattr(check, 'Memo') and check.Memo else ''
-                        })
+                        txn_id = _safe_get(check, 'TxnID')
+                        
+                        # Check if any line items are for this job
+                        job_amount = 0.0
+                        has_job = False
+                        
+                        # Check item lines
+                        item_lines = getattr(check, 'ORItemLineRetList', None)
+                        if item_lines is not None:
+                            for j in range(item_lines.Count):
+                                item_line = getattr(item_lines.GetAt(j), 'ItemLineRet', None)
+                                if not item_line:
+                                    continue
+                                customer = _line_customer(item_line)
+                                if job_index is not None and customer:
+                                    self._index_txn(job_index, customer, 'checks', txn_id)
+                                if customer == job_name:
+                                    has_job = True
+                                    job_amount += float(_safe_get(item_line, 'Amount', 0))
+                        
+                        # Check expense lines
+                        expense_lines = getattr(check, 'ExpenseLineRetList', None)
+                        if expense_lines is not None:
+                            for j in range(expense_lines.Count):
+                                exp_line = expense_lines.GetAt(j)
+                                customer = _line_customer(exp_line)
+                                if job_index is not None and customer:
+                                    self._index_txn(job_index, customer, 'checks', txn_id)
+                                if customer == job_name:
+                                    has_job = True
+                                    job_amount += float(_safe_get(exp_line, 'Amount', 0))
+                        
+                        if has_job:
+                            checks.append({
+                                'type': 'Check',
+                                'txn_id': txn_id,
+                                'ref_number': _safe_get(check, 'RefNumber'),
+                                'date': _safe_get(check, 'TxnDate'),
+                                'payee': _safe_get(getattr(check, 'PayeeEntityRef', None), 'FullName'),
+                                'job_amount': job_amount,
+                                'total_amount': float(_safe_get(check, 'Amount', 0)),
+                                'memo': _safe_get(check, 'Memo', '')
+                            })
                     
         except Exception as e:
             logger.error(f"[JobTransactionDetail] Error querying checks: {e}")
         
-        return checks
\ No newline at end of file
+        return checks
+    
+    @staticmethod
+    def _index_txn(job_index: Dict, customer: str, kind: str, txn_id: Optional[str]):
+        """Record txn_id under customer in a job index being built by a sweep"""
+        if txn_id:
+            job_index.setdefault(customer, {'bills': set(), 'checks': set()})[kind].add(txn_id)
@@ -1,118 +1,394 @@
 """
 Transaction search across all types - optimized with GeneralDetailReport
 """
-from typing import Dict, List, Optional
+from array import array
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional
 from shared_utilities.fast_qb_connection import fast_qb_connection
+from shared_utilities.report_cache import search_cache, report_rows_cache
 import logging
-from datetime import datetime, timedelta
+import pywintypes
+import time
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Ret elements each slow-path parser reads - QB serializes only these
+CHECK_RET_ELEMENTS = ('TxnID', 'TxnDate', 'Amount', 'PayeeEntityRef', 'RefNumber', 'Memo', 'AccountRef')
+BILL_RET_ELEMENTS = ('TxnID', 'TxnDate', 'AmountDue', 'VendorRef', 'RefNumber', 'Memo')
+BILL_PAYMENT_RET_ELEMENTS = ('TxnID', 'TxnDate', 'Amount', 'PayeeEntityRef', 'RefNumber', 'Memo', 'BankAccountRef')
+DEPOSIT_RET_ELEMENTS = ('TxnID', 'TxnDate', 'DepositTotal', 'Memo', 'DepositToAccountRef')
+RECEIVE_PAYMENT_RET_ELEMENTS = ('TxnID', 'TxnDate', 'TotalAmount', 'CustomerRef', 'RefNumber', 'Memo')
+
+# Transaction types search_by_amount can be limited to (its result 'type' values)
+SEARCH_TYPES = ('Check', 'Bill', 'Bill Payment', 'Invoice', 'Deposit', 'ReceivePayment')
+_SEARCH_TYPES_BY_KEY = {name.casefold(): name for name in SEARCH_TYPES}
+# GeneralDetailReport type labels that differ from the SEARCH_TYPES name
+REPORT_TYPE_NAMES = {
+    'Bill Pmt -Check': 'Bill Payment',
+    'Bill Pmt -CCard': 'Bill Payment',
+    'Payment': 'ReceivePayment',
+}
+
+
+def _amount(row, tag: str) -> float:
+    """<tag> of a *Ret element as a float, or 0"""
+    value = row.findtext(tag)
+    return float(value) if value else 0.0
+
+
+def _ref(row, tag: str) -> str:
+    """<tag><FullName> of a *Ret element's *Ref, or 'N/A'"""
+    return row.findtext(f'{tag}/FullName') or 'N/A'
+
+
+# Parsed GeneralDetailReport rows, one parallel column per field (row i is index i
+# of each). amounts is array('d') of absolute amounts, amount_cents the same in
+# whole cents as array('q'), date_keys array('l') of date ordinals for sorting
+# (0 when the date text didn't parse). Report rows carry no TxnID, so there is
+# no column for it. Cached columns are frozen - tuples and read-only array views.
+ReportColumns = namedtuple('ReportColumns',
+                           'types dates names ref_numbers memos accounts amounts amount_cents date_keys')
+
+# Report money text like "$1,234.56" or "(1,234.56)" -> digits in one translate() pass
+_AMOUNT_DROP = str.maketrans('', '', '$,()')
+
+
+def _report_amount(value) -> float:
+    """Report amount cell -> float, parentheses meaning negative; raises ValueError if not a number"""
+    text = str(value)
+    amount = float(text.translate(_AMOUNT_DROP))
+    return -amount if text.startswith('(') else amount
+
+
+def _empty_report_columns() -> ReportColumns:
+    return ReportColumns([], [], [], [], [], [], array('d'), array('q'), array('l'))
+
+
+def _freeze_report_columns(columns: ReportColumns) -> ReportColumns:
+    """Lists -> tuples and arrays -> read-only views, so the columns can be cached uncopied"""
+    return ReportColumns(*(memoryview(column).toreadonly() if isinstance(column, array) else tuple(column)
+                           for column in columns))
+
+
+def _com_value(obj, *path):
+    """obj.<path...>.GetValue(), or None when any step is absent/unset
+    
+    One getattr per step instead of hasattr + attribute + GetValue - every
+    probe on a COM object is an IDispatch name lookup.
+    """
+    for name in path:
+        obj = getattr(obj, name, None)
+        if not obj:
+            return None
+    return obj.GetValue()
+
+
+def _fmt_date(value) -> str:
+    """QB date value as YYYY-MM-DD, straight from its fields rather than str()[:10]"""
+    if isinstance(value, date):
+        return f"{value.year:04d}-{value.month:02d}-{value.day:02d}"
+    return str(value)[:10]
+
+
+@lru_cache(maxsize=256)
+def _parse_mdy(date_str: str) -> Optional[datetime]:
+    """Parse MM-DD-YYYY, MM/DD/YYYY or YYYY-MM-DD to a datetime, or None if it isn't a date
+    
+    None rather than a "now" fallback, so a bad string never caches a stale today.
+    """
+    parts = date_str.replace('/', '-').split('-')
+    if len(parts) == 3:
+        try:
+            if len(parts[0]) == 4:  # YYYY-MM-DD
+                return datetime(int(parts[0]), int(parts[1]), int(parts[2]))
+            return datetime(int(parts[2]), int(parts[0]), int(parts[1]))  # MM-DD-YYYY
+        except ValueError:
+            pass
+    return None
+
+
+def _qb_date(date_str: str) -> str:
+    """Date string as QBFC's YYYY-MM-DD; anything unparseable goes through as is for QB to reject"""
+    parsed = _parse_mdy(date_str)
+    return parsed.strftime('%Y-%m-%d') if parsed else date_str
+
+
+@lru_cache(maxsize=1024)
+def _report_date_key(date_str: str) -> int:
+    """Report date text as a date ordinal - sorts by real date, not by string; 0 if unparseable"""
+    parsed = _parse_mdy(date_str)
+    return parsed.toordinal() if parsed else 0
+
+
+def _txn_date(row) -> Optional[date]:
+    """<TxnDate> of a *Ret element (YYYY-MM-DD) as a date, or None"""
+    value = row.findtext('TxnDate')
+    try:
+        return date.fromisoformat(value[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def _query_responses(response_xml: str) -> list:
+    """The *QueryRs elements of a QBXML response document, in request order"""
+    return list(ET.fromstring(response_xml).find('QBXMLMsgsRs'))
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _txn_date_key(txn) -> date:
+    """Sort key for TxnRows - real dates, undated rows last when newest-first"""
+    return txn.date_obj or date.min
+
+
+# Per-type (result key, extractor) columns for the slow-path search results -
+# built once, applied only to *Ret elements whose amount matched
+CHECK_EXTRACTORS = (
+    ('type', lambda row: 'Check'),
+    ('date_obj', _txn_date),
+    ('amount', lambda row: _amount(row, 'Amount')),
+    ('name', lambda row: _ref(row, 'PayeeEntityRef')),
+    ('ref_number', lambda row: row.findtext('RefNumber', '')),
+    ('memo', lambda row: row.findtext('Memo', '')),
+    ('account', lambda row: _ref(row, 'AccountRef')),
+    ('txn_id', lambda row: row.findtext('TxnID', 'N/A')),
+)
+BILL_EXTRACTORS = (
+    ('type', lambda row: 'Bill'),
+    ('date_obj', _txn_date),
+    ('amount', lambda row: _amount(row, 'AmountDue')),
+    ('name', lambda row: _ref(row, 'VendorRef')),
+    ('ref_number', lambda row: row.findtext('RefNumber', '')),
+    ('memo', lambda row: row.findtext('Memo', '')),
+    ('txn_id', lambda row: row.findtext('TxnID', 'N/A')),
+)
+BILL_PAYMENT_EXTRACTORS = (
+    ('type', lambda row: 'Bill Payment'),
+    ('date_obj', _txn_date),
+    ('amount', lambda row: _amount(row, 'Amount')),
+    ('name', lambda row: _ref(row, 'PayeeEntityRef')),
+    ('ref_number', lambda row: row.findtext('RefNumber', '')),
+    ('memo', lambda row: row.findtext('Memo', '')),
+    ('account', lambda row: _ref(row, 'BankAccountRef')),
+    ('txn_id', lambda row: row.findtext('TxnID', 'N/A')),
+)
+INVOICE_EXTRACTORS = (
+    ('type', lambda row: 'Invoice'),
+    ('date_obj', _txn_date),
+    ('amount', lambda row: _amount(row, 'TotalAmount')),
+    ('name', lambda row: _ref(row, 'CustomerRef')),
+    ('ref_number', lambda row: row.findtext('RefNumber', '')),
+    ('memo', lambda row: row.findtext('Memo', '')),
+    ('txn_id', lambda row: row.findtext('TxnID', 'N/A')),
+)
+DEPOSIT_EXTRACTORS = (
+    ('type', lambda row: 'Deposit'),
+    ('date_obj', _txn_date),
+    ('amount', lambda row: _amount(row, 'DepositTotal')),
+    ('name', lambda row: 'Deposit'),
+    ('memo', lambda row: row.findtext('Memo', '')),
+    ('account', lambda row: _ref(row, 'DepositToAccountRef')),
+    ('txn_id', lambda row: row.findtext('TxnID', 'N/A')),
+)
+RECEIVE_PAYMENT_EXTRACTORS = (
+    ('type', lambda row: 'ReceivePayment'),
+    ('date_obj', _txn_date),
+    ('amount', lambda row: _amount(row, 'TotalAmount')),
+    ('name', lambda row: _ref(row, 'CustomerRef')),
+    ('ref_number', lambda row: row.findtext('RefNumber', '')),
+    ('memo', lambda row: row.findtext('Memo', '')),
+    ('txn_id', lambda row: row.findtext('TxnID', 'N/A')),
+)
+
+
+class TxnRow:
+    """One slow-search match - fixed slots instead of a dict per row until the API boundary"""
+    __slots__ = ('type', 'date_obj', 'amount', 'name', 'ref_number', 'memo', 'account', 'txn_id')
+
+    def to_dict(self) -> Dict:
+        """Result dict for callers - date as YYYY-MM-DD, then the fields this type's extractors set"""
+        result = {'type': self.type, 'date': _fmt_date(self.date_obj) if self.date_obj else 'N/A'}
+        for field in self.__slots__[2:]:
+            if hasattr(self, field):
+                result[field] = getattr(self, field)
+        return result
+
+
 class TransactionSearch:
     """Search all transaction types - optimized version"""
 
+    def close(self):
+        """Disconnect from QuickBooks if no other caller is mid-session - for shutdown, not after each search"""
+        fast_qb_connection.close_when_idle()
+
+    @staticmethod
+    def invalidate():
+        """Drop cached amount searches and report rows - call after writing transactions"""
+        search_cache.discard(lambda key: key[0] == 'amount_search')
+        report_rows_cache.discard(lambda key: key[0] == 'general_detail_txns')
+
     def search_by_amount(self, amount: float, date_from: Optional[str] = None,
-                         date_to: Optional[str] = None, tolerance: float = 0.01) -> Dict:
+                         date_to: Optional[str] = None, tolerance: float = 0.01,
+                         types: Optional[List[str]] = None, limit: Optional[int] = None) -> Dict:
         """
         Search for transactions by amount - tries optimized method first
+        Successful results are cached for 60 seconds per (amount, dates, tolerance, types, limit).
+        Open-ended dates mean "this year through today", for both search methods,
+        so results are stable to the day.
+        types limits the search to some of SEARCH_TYPES (default: every type,
+        including report-only ones such as General Journal or Sales Receipt).
+        Names match case-insensitively; an unknown name fails the search.
+        limit keeps only the newest `limit` matches (default: all of them).
         """
-        # Try the fast method first
-        result = self.search_by_amount_optimized(amount, date_from, date_to, tolerance)
-        if result.get('success'):
-            return result
+        if isinstance(types, str):  # "Check,Bill" from the command line
+            types = [t.strip() for t in types.split(',') if t.strip()]
+        # Match names case-insensitively ("check" -> "Check") and reject unknown
+        # ones rather than quietly searching fewer types
+        if types:
+            canonical = [_SEARCH_TYPES_BY_KEY.get(t.casefold()) for t in types]
+            unknown = [t for t, name in zip(types, canonical) if name is None]
+            if unknown:
+                return {"success": False,
+                        "error": f"Unknown transaction type(s): {', '.join(unknown)}. "
+                                 f"Valid types: {', '.join(SEARCH_TYPES)}"}
+            types = canonical
+        # No types means no filter on the report; the slow path still needs
+        # to know which sub-queries to build
+        type_filter = frozenset(types) if types else None
+
+        # Snap open ends to concrete days once - the optimized report needs them
+        # anyway, the slow fallback then searches the same window instead of
+        # pulling every transaction ever entered, and the cache key rolls over at midnight
+        now = datetime.now()
+        effective_from = date_from or f"01-01-{now.year}"
+        effective_to = date_to or now.strftime('%m-%d-%Y')
+        cache_key = ('amount_search', round(amount, 2), effective_from, effective_to, round(tolerance, 4),
+                     tuple(sorted(type_filter)) if type_filter else None, limit)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        # Fall back to the thorough but slow method
-        logger.info("Falling back to multi-query search method")
-        return self.search_by_amount_slow(amount, date_from, date_to, tolerance)
+        # Try the fast method first
+        result = self.search_by_amount_optimized(amount, effective_from, effective_to, tolerance, type_filter, limit)
+        if not result.get('success'):
+            # Fall back to the thorough but slow method
+            logger.info("Falling back to multi-query search method")
+            result = self.search_by_amount_slow(amount, effective_from, effective_to, tolerance,
+                                               type_filter or SEARCH_TYPES, limit)
+
+        # A partial result (some type failed) is returned but not cached
+        if result.get('success') and not result.get('partial'):
+            search_cache.set(cache_key, result)
+        return result
+
+    def search_by_amount_iter(self, amount: float, date_from: Optional[str] = None,
+                              date_to: Optional[str] = None, tolerance: float = 0.01,
+                              types: Optional[List[str]] = None,
+                              limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield the matching transactions one at a time, newest first
+        For serializers that write each row as it goes (e.g. one json.dumps line
+        per transaction) instead of building the whole response document.
+        
+        Args:
+            Same as search_by_amount
+        
+        Raises:
+            RuntimeError: When the search failed
+        """
+        result = self.search_by_amount(amount, date_from, date_to, tolerance, types, limit)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error', 'Search failed'))
+        transactions = result['transactions']
+        result = None  # only the rows are needed from here on
+        # Pop from the end of the reversed list - each row is released once yielded
+        transactions.reverse()
+        while transactions:
+            yield transactions.pop()
 
     def search_by_amount_optimized(self, amount: float, date_from: Optional[str] = None,
-                                   date_to: Optional[str] = None, tolerance: float = 0.01) -> Dict:
+                                   date_to: Optional[str] = None, tolerance: float = 0.01,
+                                   types=None, limit: Optional[int] = None) -> Dict:
         """
         FAST: Search using GeneralDetailReport - ONE query for all transaction types
+        The parsed report rows are cached for 60 seconds per date window, so
+        searching several amounts over the same dates runs the report once.
+        types keeps only rows of those SEARCH_TYPES (default: every report row type).
+        With a limit, the newest-first scan stops as soon as `limit` unique
+        transactions are collected.
         """
         try:
-            if not fast_qb_connection.connect():
-                return {"success": False, "error": "Failed to connect to QuickBooks"}
-
             logger.info(f"[OPTIMIZED] Searching for ${amount:.2f} using GeneralDetailReport")
 
-            # Default to current year if no date range specified
+            # Default to current year if no date range specified - one clock
+            # read, so both ends agree even across midnight or New Year
+            now = datetime.now()
             if not date_from:
-                date_from = f"01-01-{datetime.now().year}"
+                date_from = f"01-01-{now.year}"
             if not date_to:
-                date_to = datetime.now().strftime('%m-%d-%Y')
+                date_to = now.strftime('%m-%d-%Y')
 
-            # Create report request
-            request_set = fast_qb_connection.create_request_set()
-            report_query = request_set.AppendGeneralDetailReportQueryRq()
+            columns = self._get_report_txns(date_from, date_to)
 
-            # Set report type to Transaction Detail by Account (type 27)
-            report_query.GeneralDetailReportType.SetValue(27)
-
-            # Set date range
-            report_period = report_query.ORReportPeriod.ReportPeriod
-            from_date = self._parse_date_for_report(date_from)
-            to_date = self._parse_date_for_report(date_to)
-            report_period.FromReportDate.SetValue(from_date)
-            report_period.ToReportDate.SetValue(to_date)
-
-            # Process the request
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-
-            if response.StatusCode != 0:
-                error_msg = response.StatusMessage if hasattr(response, 'StatusMessage') else 'Unknown'
-                logger.error(f"Report query failed: {error_msg}")
-                return {"success": False, "error": error_msg}
-
-            # Parse report and filter by amount
+            # Filter by amount and deduplicate - compared in whole cents, so
+            # e.g. 125.43 vs 125.42999999 can't fall either side of the tolerance
             transactions = []
+            append = transactions.append
             seen_transactions = set()  # Track unique transactions
-
-            if hasattr(response, 'Detail') and response.Detail:
-                report = response.Detail
-                all_txns = self._parse_general_report(report)
-
-                # Filter by amount and deduplicate
-                for txn in all_txns:
-                    txn_amount = abs(float(txn.get('amount', 0)))
-                    if abs(txn_amount - abs(amount)) <= tolerance:
-                        # Create unique key for deduplication
-                        txn_type = txn.get('txn_type', 'Unknown')
-                        txn_date = txn.get('date', 'N/A')
-                        txn_name = txn.get('name', 'N/A')
-                        account = txn.get('account', 'N/A')
-
-                        # Filter out duplicate accounting entries
-                        # For Invoices/Payments: Skip "Accounts Receivable" entries
-                        # For Bills: Skip "Accounts Payable" entries
-                        # This keeps only the meaningful account (income/expense/bank)
-
-                        skip_entry = False
-                        if txn_type in ['Invoice', 'Payment'] and account == 'Accounts Receivable':
-                            skip_entry = True
-                        elif txn_type == 'Bill' and account == 'Accounts Payable':
-                            skip_entry = True
-
-                        # Create unique transaction key
-                        txn_key = (txn_type, txn_date, txn_name, txn_amount)
-
-                        # Add transaction if not skipped and not already seen
-                        if not skip_entry and txn_key not in seen_transactions:
-                            seen_transactions.add(txn_key)
-                            transactions.append({
-                                'type': txn_type,
-                                'date': txn_date,
-                                'amount': txn_amount,
-                                'name': txn_name,
-                                'ref_number': txn.get('ref_number', ''),
-                                'memo': txn.get('memo', ''),
-                                'account': account,
-                                'txn_id': txn.get('txn_id', 'N/A')
-                            })
-
-            # Sort by date (newest first)
-            transactions.sort(key=lambda x: x.get('date', ''), reverse=True)
+            target_cents = round(abs(amount) * 100)
+            tolerance_cents = round(tolerance * 100)
+            lo, hi = target_cents - tolerance_cents, target_cents + tolerance_cents
+
+            # One pass over the flat amount column; result dicts are built for matches only.
+            # Matches are put newest-first by their date ordinals up front (a stable
+            # sort, so duplicates keep report order and the same one is kept)
+            matches = [i for i, cents in enumerate(columns.amount_cents) if lo <= cents <= hi]
+            matches.sort(key=columns.date_keys.__getitem__, reverse=True)
+            for i in matches:
+                txn_amount = columns.amounts[i]
+                # Create unique key for deduplication
+                txn_type = columns.types[i]
+                if types is not None and REPORT_TYPE_NAMES.get(txn_type, txn_type) not in types:
+                    continue
+                txn_date = columns.dates[i]
+                txn_name = columns.names[i]
+                account = columns.accounts[i]
+
+                # Filter out duplicate accounting entries
+                # For Invoices/Payments: Skip "Accounts Receivable" entries
+                # For Bills: Skip "Accounts Payable" entries
+                # This keeps only the meaningful account (income/expense/bank)
+
+                skip_entry = False
+                if txn_type in ['Invoice', 'Payment'] and account == 'Accounts Receivable':
+                    skip_entry = True
+                elif txn_type == 'Bill' and account == 'Accounts Payable':
+                    skip_entry = True
+
+                # Create unique transaction key
+                txn_key = (txn_type, txn_date, txn_name, txn_amount)
+
+                # Add transaction if not skipped and not already seen
+                if not skip_entry and txn_key not in seen_transactions:
+                    seen_transactions.add(txn_key)
+                    append({
+                        'type': txn_type,
+                        'date': txn_date,
+                        'amount': txn_amount,
+                        'name': txn_name,
+                        'ref_number': columns.ref_numbers[i],
+                        'memo': columns.memos[i],
+                        'account': account,
+                        'txn_id': 'N/A'
+                    })
+                    if limit and len(transactions) >= limit:
+                        break
 
             logger.info(f"[OPTIMIZED] Found {len(transactions)} unique transactions")
 
@@ -127,441 +403,447 @@ class TransactionSearch:
         except Exception as e:
             logger.error(f"Optimized search failed: {str(e)}")
             return {"success": False, "error": str(e)}
-        finally:
-            fast_qb_connection.disconnect()
 
-    def _parse_general_report(self, report) -> List[Dict]:
-        """Parse GeneralDetailReport response into transactions"""
-        transactions = []
-        current_account = None
-
-        try:
-            if not hasattr(report, 'ReportData'):
-                return []
-
-            report_data = report.ReportData
-
-            # Transaction Detail by Account structure:
-            # TextRows = account names, DataRows = transactions
-            if hasattr(report_data, 'ORReportDataList'):
-                data_list = report_data.ORReportDataList
+    def _get_report_txns(self, date_from: str, date_to: str) -> ReportColumns:
+        """
+        Parsed Transaction Detail by Account rows for a date window, from cache when fresh
+        
+        Args:
+            date_from: Start date (MM-DD-YYYY or MM/DD/YYYY)
+            date_to: End date (MM-DD-YYYY or MM/DD/YYYY)
+        
+        Returns:
+            The report's ReportColumns, frozen (shared with the cache - don't mutate)
+        
+        Raises:
+            ConnectionError: When QuickBooks is unavailable
+            RuntimeError: When QuickBooks rejects the report query
+        """
+        cache_key = ('general_detail_txns', date_from, date_to)
+        cached = report_rows_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-                for i in range(data_list.Count):
-                    data_item = data_list.GetAt(i)
+        # The session stays open for the next search - see close()
+        with fast_qb_connection.session():
+            # Create report request
+            request_set = fast_qb_connection.create_request_set()
+            report_query = request_set.AppendGeneralDetailReportQueryRq()
 
-                    # Check for account name (TextRow)
-                    if hasattr(data_item, 'TextRow') and data_item.TextRow:
-                        text_row = data_item.TextRow
-                        if hasattr(text_row, 'value') and text_row.value:
-                            current_account = text_row.value.GetValue()
+            # Set report type to Transaction Detail by Account (type 27)
+            report_query.GeneralDetailReportType.SetValue(27)
 
-                    # Check for transaction (DataRow)
-                    elif hasattr(data_item, 'DataRow') and data_item.DataRow:
-                        txn = self._parse_report_data_row(data_item.DataRow, current_account)
-                        if txn and txn.get('date'):
-                            transactions.append(txn)
+            # Set date range
+            report_period = report_query.ORReportPeriod.ReportPeriod
+            from_date = _parse_mdy(date_from) or datetime.now()
+            to_date = _parse_mdy(date_to) or datetime.now()
+            report_period.FromReportDate.SetValue(from_date)
+            report_period.ToReportDate.SetValue(to_date)
 
-        except Exception as e:
-            logger.error(f"Error parsing report: {str(e)}")
+            # Process the request
+            response_set = fast_qb_connection.process_request_set(request_set)
+            response = response_set.ResponseList.GetAt(0)
 
-        return transactions
+            if response.StatusCode != 0:
+                error_msg = response.StatusMessage if hasattr(response, 'StatusMessage') else 'Unknown'
+                logger.error(f"Report query failed: {error_msg}")
+                raise RuntimeError(error_msg)
 
-    def _parse_report_data_row(self, data_row, current_account=None) -> Dict:
-        """Parse a DataRow from GeneralDetailReport"""
-        txn = {
-            'account': current_account,
-            'amount': 0.0
-        }
+        # Fetch Detail once - the report is a single IReportRet, never a list
+        report = getattr(response, 'Detail', None)
+        parsed = _freeze_report_columns(self._parse_general_report(report) if report else _empty_report_columns())
+        report_rows_cache.set(cache_key, parsed)
+        return parsed
 
-        try:
-            if hasattr(data_row, 'ColDataList'):
-                col_list = data_row.ColDataList
-
-                # Columns: Type, Date, Name, Clr, Split, Debit, Credit
-                for col_idx in range(col_list.Count):
-                    col = col_list.GetAt(col_idx)
-
-                    if hasattr(col, 'value') and col.value:
-                        value = col.value.GetValue()
-
-                        if col_idx == 0:  # Transaction Type
-                            txn['txn_type'] = str(value) if value else None
-                        elif col_idx == 1:  # Date
-                            txn['date'] = str(value) if value else None
-                        elif col_idx == 2:  # Name/Payee
-                            txn['name'] = str(value) if value else None
-                        elif col_idx == 3:  # Ref Number (sometimes)
-                            # This might be cleared status or ref number
-                            if value and str(value).isdigit():
-                                txn['ref_number'] = str(value)
-                        elif col_idx == 4:  # Split/Memo
-                            if value:
-                                txn['memo'] = str(value)
-                        elif col_idx == 5:  # Debit Amount
-                            if value:
-                                try:
-                                    amount_str = str(value).replace('$', '').replace(',', '').replace('(', '-').replace(')', '')
-                                    amount = float(amount_str)
-                                    if amount != 0:
-                                        txn['amount'] = abs(amount)
-                                except:
-                                    pass
-                        elif col_idx == 6:  # Credit Amount
-                            if value and txn.get('amount', 0) == 0:
-                                try:
-                                    amount_str = str(value).replace('$', '').replace(',', '').replace('(', '-').replace(')', '')
-                                    amount = float(amount_str)
-                                    if amount != 0:
-                                        txn['amount'] = abs(amount)
-                                except:
-                                    pass
+    def _parse_general_report(self, report) -> ReportColumns:
+        """
+        Parse GeneralDetailReport response into columns of transactions
+        
+        Columns rather than a dict per row: the amount filter scans one flat
+        array, and only matching rows are ever turned into result dicts.
+        A row QuickBooks can't hand over is skipped and counted (one warning per
+        report); failing to walk the report itself raises, so a half-read
+        report is never cached as if it were complete.
+        """
+        columns = _empty_report_columns()
+        current_account = None
+        skipped = 0
+
+        report_data = getattr(report, 'ReportData', None)
+        if report_data is None:
+            return columns
+
+        # Transaction Detail by Account structure:
+        # TextRows = account names, DataRows = transactions
+        data_list = getattr(report_data, 'ORReportDataList', None)
+        if data_list is not None:
+            get_at = data_list.GetAt
+
+            for i in range(data_list.Count):
+                data_item = get_at(i)
+
+                # Check for account name (TextRow)
+                text_row = getattr(data_item, 'TextRow', None)
+                if text_row:
+                    account_name = _com_value(text_row, 'value')
+                    if account_name:
+                        current_account = account_name
+
+                # Check for transaction (DataRow)
+                else:
+                    data_row = getattr(data_item, 'DataRow', None)
+                    if data_row:
+                        try:
+                            self._parse_report_data_row(data_row, current_account, columns)
+                        except (AttributeError, pywintypes.com_error):
+                            skipped += 1
+
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable report rows")
+        return columns
+
+    def _parse_report_data_row(self, data_row, current_account, columns: ReportColumns) -> bool:
+        """
+        Parse a DataRow from GeneralDetailReport straight onto the report columns
 
-        except Exception as e:
-            logger.debug(f"Error parsing data row: {str(e)}")
+        Fields are read into locals and appended in one go, so no intermediate
+        dict is built per row and a half-read row never leaves the columns uneven.
 
-        return txn if txn.get('date') else None
+        Returns:
+            True when the row had a date and was added
 
-    def _parse_date_for_report(self, date_str: str):
-        """Convert date string to datetime for report query"""
-        try:
-            # Handle MM-DD-YYYY or MM/DD/YYYY
-            date_str = date_str.replace('/', '-')
-            parts = date_str.split('-')
-            if len(parts) == 3:
-                if len(parts[0]) == 2:  # MM-DD-YYYY
-                    return datetime(int(parts[2]), int(parts[0]), int(parts[1]))
-                else:  # YYYY-MM-DD
-                    return datetime(int(parts[0]), int(parts[1]), int(parts[2]))
-        except:
-            pass
-        return datetime.now()
+        Raises:
+            AttributeError, pywintypes.com_error: When QuickBooks can't hand over a column
+        """
+        txn_type = 'Unknown'
+        txn_date = None
+        name = 'N/A'
+        ref_number = ''
+        memo = ''
+        amount = 0.0
+
+        col_list = getattr(data_row, 'ColDataList', None)
+        if col_list is not None:
+            get_at = col_list.GetAt
+
+            # Columns: Type, Date, Name, Clr, Split, Debit, Credit
+            for col_idx in range(col_list.Count):
+                value = _com_value(get_at(col_idx), 'value')
+
+                if value is not None:
+                    if col_idx == 0:  # Transaction Type
+                        txn_type = str(value) if value else None
+                    elif col_idx == 1:  # Date
+                        txn_date = str(value) if value else None
+                    elif col_idx == 2:  # Name/Payee
+                        name = str(value) if value else None
+                    elif col_idx == 3:  # Ref Number (sometimes)
+                        # This might be cleared status or ref number
+                        if value and str(value).isdigit():
+                            ref_number = str(value)
+                    elif col_idx == 4:  # Split/Memo
+                        if value:
+                            memo = str(value)
+                    elif col_idx == 5:  # Debit Amount
+                        if value:
+                            try:
+                                amount = abs(_report_amount(value))
+                            except ValueError:
+                                pass
+                    elif col_idx == 6:  # Credit Amount
+                        if value and amount == 0:
+                            try:
+                                amount = abs(_report_amount(value))
+                            except ValueError:
+                                pass
+
+        if not txn_date:
+            return False
+
+        columns.types.append(txn_type)
+        columns.dates.append(txn_date)
+        columns.names.append(name)
+        columns.ref_numbers.append(ref_number)
+        columns.memos.append(memo)
+        columns.accounts.append(current_account)
+        columns.amounts.append(amount)
+        columns.amount_cents.append(round(amount * 100))
+        columns.date_keys.append(_report_date_key(txn_date))
+        return True
 
     def search_by_amount_slow(self, amount: float, date_from: Optional[str] = None,
-                              date_to: Optional[str] = None, tolerance: float = 0.01) -> Dict:
+                              date_to: Optional[str] = None, tolerance: float = 0.01,
+                              types=SEARCH_TYPES, limit: Optional[int] = None) -> Dict:
         """
-        SLOW: Original method - searches 5 transaction types separately
+        SLOW: Original method - searches 6 transaction types separately
+        All six queries go to QuickBooks in one request set (one round-trip)
 
         Args:
             amount: Amount to search for
             date_from: Start date (MM-DD-YYYY or MM/DD/YYYY)
             date_to: End date (MM-DD-YYYY or MM/DD/YYYY)
             tolerance: Amount tolerance for matching (default 0.01)
+            types: Transaction types to query (default: all of SEARCH_TYPES)
+            limit: Keep only the newest `limit` matches (default: all of them)
 
         Returns:
-            Dictionary with found transactions
+            Dictionary with found transactions, plus per_type {type: {count, error, elapsed_ms}}
+            and partial=True when any type failed. request_ms is the batched round-trip
+            (None when each type had to be sent on its own)
         """
         try:
-            if not fast_qb_connection.connect():
-                return {"success": False, "error": "Failed to connect to QuickBooks"}
-
-            logger.info(f"[SLOW METHOD] Searching 6 transaction types for ${amount:.2f}")
-            transactions = []
-
-            # Search Checks first
-            logger.info("Searching checks...")
-            transactions.extend(self._search_checks(amount, date_from, date_to, tolerance))
+            # The session stays open for the next search - see close()
+            with fast_qb_connection.session():
+                logger.info(f"[SLOW METHOD] Searching {len(types)} transaction types for ${amount:.2f}")
+                transactions = []
+                per_type = {}
+                request_ms = None
+
+                # Parse the date window once; every query builder takes QB's YYYY-MM-DD
+                date_from = _qb_date(date_from) if date_from else None
+                date_to = _qb_date(date_to) if date_to else None
+
+                # (type, label, add query to request set, parse its response) - checks first
+                searches = tuple(search for search in (
+                    ('Check', 'checks', self._build_check_query, self._parse_check_response),
+                    ('Bill', 'bills', self._build_bill_query, self._parse_bill_response),
+                    ('Bill Payment', 'bill payments', self._build_bill_payment_query, self._parse_bill_payment_response),
+                    ('Invoice', 'invoices', self._build_invoice_query, self._parse_invoice_response),
+                    ('Deposit', 'deposits', self._build_deposit_query, self._parse_deposit_response),
+                    ('ReceivePayment', 'customer payments', self._build_receive_payment_query, self._parse_receive_payment_response),
+                ) if search[0] in types)
+
+                try:
+                    request_set = fast_qb_connection.create_request_set()
+                    request_set.Attributes.OnError = 1  # continueOnError - one failing type doesn't stop the rest
+                    built = []
+                    for type_name, label, build, parse in searches:
+                        try:
+                            build(request_set, date_from, date_to)
+                            built.append((type_name, label, parse))
+                        except Exception as e:
+                            logger.warning(f"Error building {label} query: {e}")
+                            per_type[type_name] = {"count": 0, "error": str(e), "elapsed_ms": 0.0}
+
+                    # The whole response comes back as one XML string - one COM call,
+                    # instead of a dispatch per field of every row
+                    started = time.perf_counter()
+                    responses = _query_responses(fast_qb_connection.process_request_set_xml(request_set))
+                    request_ms = _elapsed_ms(started)
+                    if len(responses) != len(built):
+                        raise RuntimeError(f"Expected {len(built)} query responses, got {len(responses)}")
+                    for (type_name, label, parse), response in zip(built, responses):
+                        per_type[type_name] = self._collect_type(
+                            label, parse, response, amount, tolerance, transactions, time.perf_counter())
+                except Exception as e:
+                    # Some QB installs reject mixed query types in one message set -
+                    # send each type on its own (serially: the COM session is single-threaded)
+                    logger.warning(f"Batched search failed, querying each type separately: {e}")
+                    transactions = []
+                    per_type = {}
+                    request_ms = None
+                    for type_name, label, build, parse in searches:
+                        started = time.perf_counter()
+                        try:
+                            request_set = fast_qb_connection.create_request_set()
+                            build(request_set, date_from, date_to)
+                            response = _query_responses(fast_qb_connection.process_request_set_xml(request_set))[0]
+                        except Exception as e:
+                            logger.warning(f"Error searching {label}: {e}")
+                            per_type[type_name] = {"count": 0, "error": str(e), "elapsed_ms": _elapsed_ms(started)}
+                            continue
+                        per_type[type_name] = self._collect_type(
+                            label, parse, response, amount, tolerance, transactions, started)
+
+                logger.info("[SLOW METHOD] Per type: " + ", ".join(
+                    f"{type_name} {status['count']} in {status['elapsed_ms']}ms" + (" (FAILED)" if status['error'] else "")
+                    for type_name, status in per_type.items()))
+
+                # Sort by date
+                transactions.sort(key=_txn_date_key, reverse=True)
+                if limit:
+                    del transactions[limit:]
             
-            # Search Bills
-            logger.info("Searching bills...")
-            transactions.extend(self._search_bills(amount, date_from, date_to, tolerance))
-
-            # Search Bill Payments
-            logger.info("Searching bill payments...")
-            transactions.extend(self._search_bill_payments(amount, date_from, date_to, tolerance))
-
-            # Search Invoices
-            logger.info("Searching invoices...")
-            transactions.extend(self._search_invoices(amount, date_from, date_to, tolerance))
-
-            # Search Deposits
-            logger.info("Searching deposits...")
-            transactions.extend(self._search_deposits(amount, date_from, date_to, tolerance))
-
-            # Search Customer Payments (ReceivePayments)
-            logger.info("Searching customer payments...")
-            transactions.extend(self._search_receive_payments(amount, date_from, date_to, tolerance))
-
-            # Sort by date
-            transactions.sort(key=lambda x: x.get('date', ''), reverse=True)
-            
-            return {
-                "success": True,
-                "transactions": transactions,
-                "count": len(transactions),
-                "search_amount": amount
-            }
+                return {
+                    "success": True,
+                    "transactions": [txn.to_dict() for txn in transactions],
+                    "count": len(transactions),
+                    "search_amount": amount,
+                    "per_type": per_type,
+                    "request_ms": request_ms,
+                    "partial": any(status['error'] for status in per_type.values())
+                }
             
+        except ConnectionError:
+            return {"success": False, "error": "Failed to connect to QuickBooks"}
         except Exception as e:
             logger.error(f"Error searching transactions by amount: {str(e)}")
             return {"success": False, "error": str(e)}
-        finally:
-            fast_qb_connection.disconnect()
     
-    def _search_checks(self, amount: float, date_from: Optional[str], date_to: Optional[str], tolerance: float) -> List[Dict]:
-        """Search check transactions"""
-        transactions = []
+    def _collect_type(self, label: str, parse, response, amount: float, tolerance: float,
+                      transactions: list, started: float) -> Dict:
+        """
+        Add one type's matches to transactions and report how that type went
+        
+        Args:
+            label: Transaction type name for logs
+            parse: The type's _parse_*_response
+            response: The type's *QueryRs element
+            transactions: Result list the matches are appended to
+            started: perf_counter() reading the elapsed time is measured from
+        
+        Returns:
+            {count, error, elapsed_ms} - error is None when the type was read cleanly
+        """
+        before = len(transactions)
+        error = None
         try:
-            request_set = fast_qb_connection.create_request_set()
-            check_query = request_set.AppendCheckQueryRq()
-            
-            # Simplified - just query all checks, filter in Python
-            # Date filters cause issues with complex filter paths
-            
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-            
-            if response.StatusCode == 0 and response.Detail:
-                for i in range(response.Detail.Count):
-                    check = response.Detail.GetAt(i)
-                    check_amount = check.Amount.GetValue() if hasattr(check, 'Amount') and check.Amount else 0
-                    
-                    if abs(abs(check_amount) - amount) <= tolerance:
-                        transactions.append({
-                            'type': 'Check',
-                            'date': str(check.TxnDate.GetValue())[:10] if hasattr(check, 'TxnDate') else 'N/A',
-                            'amount': check_amount,
-                            'name': check.PayeeEntityRef.FullName.GetValue() if hasattr(check, 'PayeeEntityRef') and check.PayeeEntityRef and hasattr(check.PayeeEntityRef, 'FullName') else 'N/A',
-                            'ref_number': check.RefNumber.GetValue() if hasattr(check, 'RefNumber') and check.RefNumber else '',
-                            'memo': check.Memo.GetValue() if hasattr(check, 'Memo') and check.Memo else '',
-                            'account': check.AccountRef.FullName.GetValue() if hasattr(check, 'AccountRef') and check.AccountRef and hasattr(check.AccountRef, 'FullName') else 'N/A',
-                            'txn_id': check.TxnID.GetValue() if hasattr(check, 'TxnID') else 'N/A'
-                        })
+            transactions.extend(parse(response, amount, tolerance))
         except Exception as e:
-            logger.debug(f"Error searching checks: {e}")
-        
-        return transactions
+            logger.warning(f"Error searching {label}: {e}")
+            error = str(e)
+        return {"count": len(transactions) - before, "error": error, "elapsed_ms": _elapsed_ms(started)}
     
-    def _search_bills(self, amount: float, date_from: Optional[str], date_to: Optional[str], tolerance: float) -> List[Dict]:
-        """Search bill transactions"""
-        transactions = []
-        try:
-            request_set = fast_qb_connection.create_request_set()
-            bill_query = request_set.AppendBillQueryRq()
-            
-            # Date filter
-            if date_from or date_to:
-                date_filter = bill_query.ORBillQuery.BillFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
-                if date_from:
-                    date_filter.FromTxnDate.SetValue(self._parse_date(date_from))
-                if date_to:
-                    date_filter.ToTxnDate.SetValue(self._parse_date(date_to))
-            
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
+    def _match_rows(self, response, amount: float, tolerance: float, amount_field: str,
+                    extractors: tuple, label: str) -> Iterator[TxnRow]:
+        """
+        Yield the rows of a query response whose amount is within tolerance, as TxnRows
+        
+        A generator, so matches stream straight into the caller's one result list.
+        Raises RuntimeError when QuickBooks rejected the query (any status but 0 or 1).
+        
+        Args:
+            response: One *QueryRs element of the XML response
+            amount_field: Ret element holding the transaction amount
+            extractors: (result key, extractor) pairs applied to each matching row
+            label: Transaction type name for error messages
+        """
+        # Whole cents by absolute value, matching the report path
+        target_cents = round(abs(amount) * 100)
+        tolerance_cents = round(tolerance * 100)
+        lo, hi = target_cents - tolerance_cents, target_cents + tolerance_cents
+        status = response.get('statusCode')
+        if status == '1':  # no matching objects
+            return
+        if status != '0':
+            raise RuntimeError(f"{label} query failed ({status}): {response.get('statusMessage')}")
+        # Every child of a *QueryRs is one *Ret row
+        for row in response:
+            row_cents = round(_amount(row, amount_field) * 100)
             
-            if response.StatusCode == 0 and response.Detail:
-                for i in range(response.Detail.Count):
-                    bill = response.Detail.GetAt(i)
-                    bill_amount = bill.AmountDue.GetValue() if hasattr(bill, 'AmountDue') and bill.AmountDue else 0
-                    
-                    if abs(abs(bill_amount) - amount) <= tolerance:
-                        transactions.append({
-                            'type': 'Bill',
-                            'date': str(bill.TxnDate.GetValue())[:10] if hasattr(bill, 'TxnDate') else 'N/A',
-                            'amount': bill_amount,
-                            'name': bill.VendorRef.FullName.GetValue() if hasattr(bill, 'VendorRef') and bill.VendorRef and hasattr(bill.VendorRef, 'FullName') else 'N/A',
-                            'ref_number': bill.RefNumber.GetValue() if hasattr(bill, 'RefNumber') and bill.RefNumber else '',
-                            'memo': bill.Memo.GetValue() if hasattr(bill, 'Memo') and bill.Memo else '',
-                            'txn_id': bill.TxnID.GetValue() if hasattr(bill, 'TxnID') else 'N/A'
-                        })
-        except Exception as e:
-            logger.debug(f"Error searching bills: {e}")
+            if lo <= (row_cents if row_cents >= 0 else -row_cents) <= hi:
+                txn = TxnRow()
+                for key, extract in extractors:
+                    setattr(txn, key, extract(row))
+                yield txn
+    
+    def _build_check_query(self, request_set, date_from: Optional[str], date_to: Optional[str]):
+        """Add the check query to request_set - dates already YYYY-MM-DD"""
+        check_query = request_set.AppendCheckQueryRq()
+        
+        # Date filter - checks use the ORTxnQuery.TxnFilter path, not an ORCheckQuery wrapper
+        if date_from or date_to:
+            date_filter = check_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
+            if date_from:
+                date_filter.FromTxnDate.SetValue(date_from)
+            if date_to:
+                date_filter.ToTxnDate.SetValue(date_to)
         
-        return transactions
+        for element in CHECK_RET_ELEMENTS:
+            check_query.IncludeRetElementList.Add(element)
     
-    def _search_bill_payments(self, amount: float, date_from: Optional[str], date_to: Optional[str], tolerance: float) -> List[Dict]:
-        """Search bill payment transactions"""
-        transactions = []
-        try:
-            request_set = fast_qb_connection.create_request_set()
-            payment_query = request_set.AppendBillPaymentCheckQueryRq()
-            
-            # Date filter
-            if date_from or date_to:
-                date_filter = payment_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
-                if date_from:
-                    date_filter.FromTxnDate.SetValue(self._parse_date(date_from))
-                if date_to:
-                    date_filter.ToTxnDate.SetValue(self._parse_date(date_to))
-            
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-            
-            if response.StatusCode == 0 and response.Detail:
-                for i in range(response.Detail.Count):
-                    payment = response.Detail.GetAt(i)
-                    payment_amount = payment.Amount.GetValue() if hasattr(payment, 'Amount') and payment.Amount else 0
-                    
-                    if abs(abs(payment_amount) - amount) <= tolerance:
-                        transactions.append({
-                            'type': 'Bill Payment',
-                            'date': str(payment.TxnDate.GetValue())[:10] if hasattr(payment, 'TxnDate') else 'N/A',
-                            'amount': payment_amount,
-                            'name': payment.PayeeEntityRef.FullName.GetValue() if hasattr(payment, 'PayeeEntityRef') and payment.PayeeEntityRef and hasattr(payment.PayeeEntityRef, 'FullName') else 'N/A',
-                            'ref_number': payment.RefNumber.GetValue() if hasattr(payment, 'RefNumber') and payment.RefNumber else '',
-                            'memo': payment.Memo.GetValue() if hasattr(payment, 'Memo') and payment.Memo else '',
-                            'account': payment.BankAccountRef.FullName.GetValue() if hasattr(payment, 'BankAccountRef') and payment.BankAccountRef and hasattr(payment.BankAccountRef, 'FullName') else 'N/A',
-                            'txn_id': payment.TxnID.GetValue() if hasattr(payment, 'TxnID') else 'N/A'
-                        })
-        except Exception as e:
-            logger.debug(f"Error searching bill payments: {e}")
+    def _parse_check_response(self, response, amount: float, tolerance: float) -> Iterator[TxnRow]:
+        """Pick the checks matching amount out of a check query response"""
+        return self._match_rows(response, amount, tolerance, 'Amount', CHECK_EXTRACTORS, 'checks')
+    
+    def _build_bill_query(self, request_set, date_from: Optional[str], date_to: Optional[str]):
+        """Add the bill query to request_set - dates already YYYY-MM-DD"""
+        bill_query = request_set.AppendBillQueryRq()
+        
+        # Date filter
+        if date_from or date_to:
+            date_filter = bill_query.ORBillQuery.BillFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
+            if date_from:
+                date_filter.FromTxnDate.SetValue(date_from)
+            if date_to:
+                date_filter.ToTxnDate.SetValue(date_to)
         
-        return transactions
+        for element in BILL_RET_ELEMENTS:
+            bill_query.IncludeRetElementList.Add(element)
     
-    def _search_invoices(self, amount: float, date_from: Optional[str], date_to: Optional[str], tolerance: float) -> List[Dict]:
-        """Search invoice transactions"""
-        transactions = []
-        try:
-            request_set = fast_qb_connection.create_request_set()
-            invoice_query = request_set.AppendInvoiceQueryRq()
-            
-            # Date filter
-            if date_from or date_to:
-                date_filter = invoice_query.ORInvoiceQuery.InvoiceFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
-                if date_from:
-                    date_filter.FromTxnDate.SetValue(self._parse_date(date_from))
-                if date_to:
-                    date_filter.ToTxnDate.SetValue(self._parse_date(date_to))
-            
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-            
-            if response.StatusCode == 0 and response.Detail:
-                for i in range(response.Detail.Count):
-                    invoice = response.Detail.GetAt(i)
-                    invoice_amount = invoice.TotalAmount.GetValue() if hasattr(invoice, 'TotalAmount') and invoice.TotalAmount else 0
-                    
-                    if abs(abs(invoice_amount) - amount) <= tolerance:
-                        transactions.append({
-                            'type': 'Invoice',
-                            'date': str(invoice.TxnDate.GetValue())[:10] if hasattr(invoice, 'TxnDate') else 'N/A',
-                            'amount': invoice_amount,
-                            'name': invoice.CustomerRef.FullName.GetValue() if hasattr(invoice, 'CustomerRef') and invoice.CustomerRef and hasattr(invoice.CustomerRef, 'FullName') else 'N/A',
-                            'ref_number': invoice.RefNumber.GetValue() if hasattr(invoice, 'RefNumber') and invoice.RefNumber else '',
-                            'memo': invoice.Memo.GetValue() if hasattr(invoice, 'Memo') and invoice.Memo else '',
-                            'txn_id': invoice.TxnID.GetValue() if hasattr(invoice, 'TxnID') else 'N/A'
-                        })
-        except Exception as e:
-            logger.debug(f"Error searching invoices: {e}")
+    def _parse_bill_response(self, response, amount: float, tolerance: float) -> Iterator[TxnRow]:
+        """Pick the bills matching amount out of a bill query response"""
+        return self._match_rows(response, amount, tolerance, 'AmountDue', BILL_EXTRACTORS, 'bills')
+    
+    def _build_bill_payment_query(self, request_set, date_from: Optional[str], date_to: Optional[str]):
+        """Add the bill payment (check) query to request_set - dates already YYYY-MM-DD"""
+        payment_query = request_set.AppendBillPaymentCheckQueryRq()
+        
+        # Date filter
+        if date_from or date_to:
+            date_filter = payment_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
+            if date_from:
+                date_filter.FromTxnDate.SetValue(date_from)
+            if date_to:
+                date_filter.ToTxnDate.SetValue(date_to)
         
-        return transactions
+        for element in BILL_PAYMENT_RET_ELEMENTS:
+            payment_query.IncludeRetElementList.Add(element)
     
-    def _search_deposits(self, amount: float, date_from: Optional[str], date_to: Optional[str], tolerance: float) -> List[Dict]:
-        """Search deposit transactions"""
-        transactions = []
-        try:
-            request_set = fast_qb_connection.create_request_set()
-            deposit_query = request_set.AppendDepositQueryRq()
-            
-            # Date filter
-            if date_from or date_to:
-                date_filter = deposit_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
-                if date_from:
-                    date_filter.FromTxnDate.SetValue(self._parse_date(date_from))
-                if date_to:
-                    date_filter.ToTxnDate.SetValue(self._parse_date(date_to))
-            
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-            
-            if response.StatusCode == 0 and response.Detail:
-                for i in range(response.Detail.Count):
-                    deposit = response.Detail.GetAt(i)
-                    deposit_amount = deposit.DepositTotal.GetValue() if hasattr(deposit, 'DepositTotal') and deposit.DepositTotal else 0
-                    
-                    if abs(abs(deposit_amount) - amount) <= tolerance:
-                        transactions.append({
-                            'type': 'Deposit',
-                            'date': str(deposit.TxnDate.GetValue())[:10] if hasattr(deposit, 'TxnDate') else 'N/A',
-                            'amount': deposit_amount,
-                            'name': 'Deposit',
-                            'memo': deposit.Memo.GetValue() if hasattr(deposit, 'Memo') and deposit.Memo else '',
-                            'account': deposit.DepositToAccountRef.FullName.GetValue() if hasattr(deposit, 'DepositToAccountRef') and deposit.DepositToAccountRef and hasattr(deposit.DepositToAccountRef, 'FullName') else 'N/A',
-                            'txn_id': deposit.TxnID.GetValue() if hasattr(deposit, 'TxnID') else 'N/A'
-                        })
-        except Exception as e:
-            logger.debug(f"Error searching deposits: {e}")
+    def _parse_bill_payment_response(self, response, amount: float, tolerance: float) -> Iterator[TxnRow]:
+        """Pick the bill payments matching amount out of a bill payment query response"""
+        return self._match_rows(response, amount, tolerance, 'Amount', BILL_PAYMENT_EXTRACTORS, 'bill payments')
+    
+    def _build_invoice_query(self, request_set, date_from: Optional[str], date_to: Optional[str]):
+        """Add the invoice query to request_set - dates already YYYY-MM-DD"""
+        invoice_query = request_set.AppendInvoiceQueryRq()
         
-        return transactions
-
-    def _search_receive_payments(self, amount: float, date_from: Optional[str], date_to: Optional[str], tolerance: float) -> List[Dict]:
-        """Search customer payment (ReceivePayment) transactions"""
-        transactions = []
-        try:
-            request_set = fast_qb_connection.create_request_set()
-            payment_query = request_set.AppendReceivePaymentQueryRq()
-
-            # Date filter
-            if date_from or date_to:
-                date_filter = payment_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
-                if date_from:
-                    date_filter.FromTxnDate.SetValue(self._parse_date(date_from))
-                if date_to:
-                    date_filter.ToTxnDate.SetValue(self._parse_date(date_to))
-
-            response_set = fast_qb_connection.process_request_set(request_set)
-            response = response_set.ResponseList.GetAt(0)
-
-            if response.StatusCode == 0 and response.Detail:
-                for i in range(response.Detail.Count):
-                    payment = response.Detail.GetAt(i)
-                    payment_amount = payment.TotalAmount.GetValue() if hasattr(payment, 'TotalAmount') and payment.TotalAmount else 0
-
-                    if abs(abs(payment_amount) - amount) <= tolerance:
-                        transactions.append({
-                            'type': 'ReceivePayment',
-                            'date': str(payment.TxnDate.GetValue())[:10] if hasattr(payment, 'TxnDate') else 'N/A',
-                            'amount': payment_amount,
-                            'name': payment.CustomerRef.FullName.GetValue() if hasattr(payment, 'CustomerRef') and payment.CustomerRef and hasattr(payment.CustomerRef, 'FullName') else 'N/A',
-                            'ref_number': payment.RefNumber.GetValue() if hasattr(payment, 'RefNumber') and payment.RefNumber else '',
-                            'memo': payment.Memo.GetValue() if hasattr(payment, 'Memo') and payment.Memo else '',
-                            'txn_id': payment.TxnID.GetValue() if hasattr(payment, 'TxnID') else 'N/A'
-                        })
-        except Exception as e:
-            logger.debug(f"Error searching receive payments: {e}")
-
-        return transactions
-
-    def _parse_date(self, date_str: str) -> str:
-        """Parse date string to YYYY-MM-DD format"""
-        # Handle MM-DD-YYYY or MM/DD/YYYY
-        date_str = date_str.replace('/', '-')
-        parts = date_str.split('-')
-        if len(parts) == 3:
-            if len(parts[0]) == 2:  # MM-DD-YYYY
-                return f"{parts[2]}-{parts[0]}-{parts[1]}"
-            else:  # YYYY-MM-DD
-                return date_str
-        return date_str
+        # Date filter
+        if date_from or date_to:
+            date_filter = invoice_query.ORInvoiceQuery.InvoiceFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
+            if date_from:
+                date_filter.FromTxnDate.SetValue(date_from)
+            if date_to:
+                date_filter.ToTxnDate.SetValue(date_to)
     
-    def _parse_report_row(self, row) -> Optional[Dict]:
-        """Parse a report row into transaction data"""
-        try:
-            txn_data = {}
-            
-            # Extract data from row columns
-            if hasattr(row, 'ColData'):
-                for i, col in enumerate(row.ColData):
-                    value = col.GetValue() if hasattr(col, 'GetValue') else str(col)
-                    
-                    # Map column index to field name
-                    if i == 0:
-                        txn_data['type'] = value
-                    elif i == 1:
-                        txn_data['date'] = value
-                    elif i == 2:
-                        txn_data['ref_number'] = value
-                    elif i == 3:
-                        txn_data['name'] = value
-                    elif i == 4:
-                        txn_data['memo'] = value
-                    elif i == 5:
-                        txn_data['account'] = value
-                    elif i == 6:
-                        txn_data['amount'] = value
-            
-            return txn_data if txn_data else None
-            
-        except Exception as e:
-            logger.debug(f"Error parsing report row: {e}")
-            return None
\ No newline at end of file
+    def _parse_invoice_response(self, response, amount: float, tolerance: float) -> Iterator[TxnRow]:
+        """Pick the invoices matching amount out of an invoice query response"""
+        return self._match_rows(response, amount, tolerance, 'TotalAmount', INVOICE_EXTRACTORS, 'invoices')
+    
+    def _build_deposit_query(self, request_set, date_from: Optional[str], date_to: Optional[str]):
+        """Add the deposit query to request_set - dates already YYYY-MM-DD"""
+        deposit_query = request_set.AppendDepositQueryRq()
+        
+        # Date filter
+        if date_from or date_to:
+            date_filter = deposit_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
+            if date_from:
+                date_filter.FromTxnDate.SetValue(date_from)
+            if date_to:
+                date_filter.ToTxnDate.SetValue(date_to)
+        
+        for element in DEPOSIT_RET_ELEMENTS:
+            deposit_query.IncludeRetElementList.Add(element)
+    
+    def _parse_deposit_response(self, response, amount: float, tolerance: float) -> Iterator[TxnRow]:
+        """Pick the deposits matching amount out of a deposit query response"""
+        return self._match_rows(response, amount, tolerance, 'DepositTotal', DEPOSIT_EXTRACTORS, 'deposits')
+
+    def _build_receive_payment_query(self, request_set, date_from: Optional[str], date_to: Optional[str]):
+        """Add the customer payment (ReceivePayment) query to request_set - dates already YYYY-MM-DD"""
+        payment_query = request_set.AppendReceivePaymentQueryRq()
+
+        # Date filter
+        if date_from or date_to:
+            date_filter = payment_query.ORTxnQuery.TxnFilter.ORDateRangeFilter.TxnDateRangeFilter.ORTxnDateRangeFilter.TxnDateFilter
+            if date_from:
+                date_filter.FromTxnDate.SetValue(date_from)
+            if date_to:
+                date_filter.ToTxnDate.SetValue(date_to)
+
+        for element in RECEIVE_PAYMENT_RET_ELEMENTS:
+            payment_query.IncludeRetElementList.Add(element)
+
+    def _parse_receive_payment_response(self, response, amount: float, tolerance: float) -> Iterator[TxnRow]:
+        """Pick the customer payments matching amount out of a ReceivePayment query response"""
+        return self._match_rows(response, amount, tolerance, 'TotalAmount', RECEIVE_PAYMENT_EXTRACTORS, 'receive payments')
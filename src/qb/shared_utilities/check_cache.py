@@ -3,23 +3,72 @@ Quarter-based cache for check data to improve search performance
 Caches previous quarter and current quarter checks
 """
 
+import bisect
 import time
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-import pickle
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import gzip
+import json
 import os
 
 logger = logging.getLogger(__name__)
 
+CACHE_SUFFIX = ".json.gz"
+
+
+def _json_default(value):
+    """Dates are written as ISO strings - get_recent_checks parses them back"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _check_datetime(value) -> datetime:
+    """A check's date as a naive datetime - datetime.min when missing or unreadable"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('+00:00', ''))
+        except ValueError:
+            return datetime.min
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif not isinstance(value, datetime):
+        return datetime.min
+    return value.replace(tzinfo=None)
+
+
+@lru_cache(maxsize=64)
+def _quarter_dates(quarter_key: str) -> tuple:
+    """First and last day of a quarter key - memoized, the boundaries never change"""
+    year, q = quarter_key.split('_Q')
+    year = int(year)
+    quarter = int(q)
+    
+    start_month = (quarter - 1) * 3 + 1
+    start_date = datetime(year, start_month, 1)
+    
+    if quarter == 4:
+        end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end_date = datetime(year, start_month + 3, 1) - timedelta(days=1)
+    
+    return start_date, end_date
+
+
 class CheckCache:
     """Cache for check data organized by quarters"""
     
-    def __init__(self, cache_dir: str = "cache", ttl_seconds: int = 3600):
-        """Initialize cache with directory and TTL (default 1 hour)"""
+    def __init__(self, cache_dir: str = "cache", ttl_seconds: int = 3600, max_quarters: int = 8):
+        """Initialize cache with directory, TTL (default 1 hour) and how many quarters to keep in memory"""
         self.cache_dir = cache_dir
         self.ttl = ttl_seconds
-        self.memory_cache = {}  # In-memory cache for current session
+        self.max_quarters = max_quarters
+        # In-memory cache for current session, least recently used first
+        self.memory_cache = OrderedDict()
         
         # Create cache directory if it doesn't exist
         if not os.path.exists(cache_dir):
@@ -35,105 +84,153 @@ class CheckCache:
     
     def _get_quarter_dates(self, quarter_key: str) -> tuple:
         """Get start and end dates for a quarter key"""
-        year, q = quarter_key.split('_Q')
-        year = int(year)
-        quarter = int(q)
-        
-        start_month = (quarter - 1) * 3 + 1
-        start_date = datetime(year, start_month, 1)
-        
-        if quarter == 4:
-            end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = datetime(year, start_month + 3, 1) - timedelta(days=1)
-        
-        return start_date, end_date
+        return _quarter_dates(quarter_key)
     
-    def get_current_quarter_key(self) -> str:
-        """Get the current quarter key"""
-        return self._get_quarter_key(datetime.now())
+    def get_current_quarter_key(self, now: Optional[datetime] = None) -> str:
+        """Get the current quarter key, as of now (default: the clock)"""
+        return self._get_quarter_key(now or datetime.now())
     
-    def get_previous_quarter_key(self) -> str:
-        """Get the previous quarter key"""
-        now = datetime.now()
-        three_months_ago = now - timedelta(days=90)
+    def get_previous_quarter_key(self, now: Optional[datetime] = None) -> str:
+        """Get the previous quarter key, as of now (default: the clock)"""
+        three_months_ago = (now or datetime.now()) - timedelta(days=90)
         return self._get_quarter_key(three_months_ago)
     
     def get_quarter_checks(self, quarter_key: str) -> Optional[List[Dict]]:
-        """Get cached checks for a specific quarter"""
+        """Get cached checks for a specific quarter, oldest first"""
+        entry = self._get_quarter_entry(quarter_key)
+        return entry[0] if entry else None
+    
+    def _get_quarter_entry(self, quarter_key: str) -> Optional[Tuple[List[Dict], List[datetime]]]:
+        """Cached (checks sorted by date, their parsed dates) for a quarter, or None"""
         # Check memory cache first
+        entry = self._memory_entry(quarter_key)
+        if entry is not None:
+            logger.info(f"Memory cache hit for quarter {quarter_key}: {len(entry[0])} checks")
+            return entry
+        
+        data = self._read_quarter_file(quarter_key)
+        if data is None:
+            return None
+        
+        # Also store in memory cache
+        return self._remember(quarter_key, data)
+    
+    def _memory_entry(self, quarter_key: str) -> Optional[Tuple[List[Dict], List[datetime]]]:
+        """The in-memory entry for a quarter if still fresh, dropping it once expired"""
         if quarter_key in self.memory_cache:
-            cached_data, timestamp = self.memory_cache[quarter_key]
+            cached_data, dates, timestamp = self.memory_cache[quarter_key]
             if time.time() - timestamp < self.ttl:
-                logger.info(f"Memory cache hit for quarter {quarter_key}: {len(cached_data)} checks")
-                return cached_data
+                self.memory_cache.move_to_end(quarter_key)
+                return cached_data, dates
             else:
                 del self.memory_cache[quarter_key]
+        return None
+    
+    def _read_quarter_file(self, quarter_key: str) -> Optional[List[Dict]]:
+        """
+        Checks from a quarter's disk cache file, or None when missing, unreadable or expired
         
-        # Check disk cache
-        cache_file = os.path.join(self.cache_dir, f"checks_{quarter_key}.pkl")
-        if os.path.exists(cache_file):
-            try:
-                file_age = time.time() - os.path.getmtime(cache_file)
+        Touches only the file, never memory_cache, so quarters can be read in parallel.
+        """
+        # One open() and fstat instead of exists + getmtime + open
+        cache_file = os.path.join(self.cache_dir, f"checks_{quarter_key}{CACHE_SUFFIX}")
+        data = None
+        try:
+            with open(cache_file, 'rb') as raw:
+                file_age = time.time() - os.fstat(raw.fileno()).st_mtime
                 if file_age < self.ttl:
-                    with open(cache_file, 'rb') as f:
-                        data = pickle.load(f)
-                    # Also store in memory cache
-                    self.memory_cache[quarter_key] = (data, time.time())
-                    logger.info(f"Disk cache hit for quarter {quarter_key}: {len(data)} checks")
-                    return data
-                else:
-                    # Cache expired, delete file
-                    os.remove(cache_file)
-                    logger.info(f"Disk cache expired for quarter {quarter_key}")
-            except Exception as e:
-                logger.error(f"Error reading cache file: {e}")
+                    with gzip.GzipFile(fileobj=raw) as f:
+                        data = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading cache file: {e}")
+            return None
+
+        if data is None:
+            # Cache expired, delete file - once closed, Windows won't remove an open file
+            try:
+                os.remove(cache_file)
+            except OSError:
+                pass
+            logger.info(f"Disk cache expired for quarter {quarter_key}")
+            return None
+
+        logger.info(f"Disk cache hit for quarter {quarter_key}: {len(data)} checks")
+        return data
+    
+    def _remember(self, quarter_key: str, checks: List[Dict]) -> Tuple[List[Dict], List[datetime]]:
+        """
+        Keep checks in memory, dropping expired quarters and then the least recently used
         
-        return None
+        Checks are sorted by date once, with a parallel list of their parsed
+        dates, so get_recent_checks can bisect instead of parsing every date.
+        
+        Returns:
+            (checks sorted by date, their dates) - undated checks first, as datetime.min
+        """
+        dates = [_check_datetime(check.get('date')) for check in checks]
+        order = sorted(range(len(checks)), key=dates.__getitem__)
+        checks = [checks[i] for i in order]
+        dates = [dates[i] for i in order]
+        
+        now = time.time()
+        for key in [k for k, (_, _, timestamp) in self.memory_cache.items() if now - timestamp >= self.ttl]:
+            del self.memory_cache[key]
+        
+        self.memory_cache.pop(quarter_key, None)
+        self.memory_cache[quarter_key] = (checks, dates, now)
+        while len(self.memory_cache) > self.max_quarters:
+            self.memory_cache.popitem(last=False)
+        return checks, dates
     
     def set_quarter_checks(self, quarter_key: str, checks: List[Dict]):
-        """Cache checks for a specific quarter"""
-        # Store in memory cache
-        self.memory_cache[quarter_key] = (checks, time.time())
+        """Cache checks for a specific quarter - on disk as gzipped JSON, dates as ISO strings"""
+        # Store in memory cache - sorted, so the disk copy loads already in order
+        checks, _ = self._remember(quarter_key, checks)
         
         # Store on disk
-        cache_file = os.path.join(self.cache_dir, f"checks_{quarter_key}.pkl")
+        cache_file = os.path.join(self.cache_dir, f"checks_{quarter_key}{CACHE_SUFFIX}")
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(checks, f)
+            payload = json.dumps(checks, default=_json_default, separators=(',', ':')).encode('utf-8')
+            with gzip.open(cache_file, 'wb', compresslevel=6) as f:
+                f.write(payload)
             logger.info(f"Cached {len(checks)} checks for quarter {quarter_key}")
         except Exception as e:
             logger.error(f"Error writing cache file: {e}")
     
     def get_recent_checks(self, days: int = 90) -> Optional[List[Dict]]:
-        """Get cached recent checks by combining quarters"""
-        all_checks = []
+        """Get cached recent checks by combining quarters, oldest first"""
+        # Get current and previous quarter - one clock read, so the keys and
+        # the cutoff agree even across a quarter boundary
+        now = datetime.now()
+        current_q = self.get_current_quarter_key(now)
+        prev_q = self.get_previous_quarter_key(now)
+        cutoff_date = now - timedelta(days=days)
+        quarter_keys = list(dict.fromkeys([prev_q, current_q]))
         
-        # Get current and previous quarter
-        current_q = self.get_current_quarter_key()
-        prev_q = self.get_previous_quarter_key()
+        # Quarters not in memory come from disk - read both files at once
+        # (file reads and gzip decompression release the GIL)
+        to_read = [key for key in quarter_keys if self._memory_entry(key) is None]
+        if len(to_read) > 1:
+            with ThreadPoolExecutor(max_workers=len(to_read)) as executor:
+                loaded = list(executor.map(self._read_quarter_file, to_read))
+            for quarter_key, data in zip(to_read, loaded):
+                if data is not None:
+                    self._remember(quarter_key, data)
         
-        # Get checks from both quarters
-        for quarter_key in [prev_q, current_q]:
-            quarter_checks = self.get_quarter_checks(quarter_key)
-            if quarter_checks:
-                all_checks.extend(quarter_checks)
+        # Each quarter is sorted by date - slice from the cutoff instead of
+        # parsing and comparing every check
+        filtered = []
+        found = False
+        for quarter_key in quarter_keys:
+            entry = self._get_quarter_entry(quarter_key)
+            if entry and entry[0]:
+                found = True
+                checks, dates = entry
+                filtered.extend(checks[bisect.bisect_left(dates, cutoff_date):])
         
-        if all_checks:
-            # Filter by date if needed
-            cutoff_date = datetime.now() - timedelta(days=days)
-            filtered = []
-            for check in all_checks:
-                check_date = check.get('date')
-                if check_date:
-                    if isinstance(check_date, str):
-                        try:
-                            check_date = datetime.fromisoformat(check_date.replace('+00:00', ''))
-                        except:
-                            continue
-                    if check_date >= cutoff_date:
-                        filtered.append(check)
-            
+        if found:
             logger.info(f"Returning {len(filtered)} recent checks from cache")
             return filtered
         
@@ -146,7 +243,8 @@ class CheckCache:
         # Clear disk cache
         try:
             for file in os.listdir(self.cache_dir):
-                if file.startswith('checks_') and file.endswith('.pkl'):
+                # .pkl files are left over from the old pickle format
+                if file.startswith('checks_') and file.endswith((CACHE_SUFFIX, '.pkl')):
                     os.remove(os.path.join(self.cache_dir, file))
             logger.info("Cache cleared")
         except Exception as e:
@@ -12,6 +12,20 @@ class ClaudeCLIKnowledge:
     def __init__(self):
         """Initialize with hardcoded knowledge"""
         self.knowledge = self._load_knowledge()
+        self._search_text = self._build_search_text()
+    
+    def _build_search_text(self) -> Dict[str, str]:
+        """
+        Lowercased searchable text per topic - key, issue, symptoms and solutions
+        
+        The knowledge is static, so it is lowercased once here instead of on every
+        search. Fields are joined with NUL so a query can't match across two of them.
+        """
+        return {
+            key: '\0'.join([key, info.get('issue', ''), *info.get('symptoms', []),
+                             *info.get('solutions', [])]).lower()
+            for key, info in self.knowledge.items()
+        }
     
     def _load_knowledge(self) -> Dict:
         """Load all Claude CLI knowledge"""
@@ -151,12 +165,8 @@ class ClaudeCLIKnowledge:
         query_lower = query.lower()
         
         for key, info in self.knowledge.items():
-            # Check if query matches issue, symptoms, or solutions
-            if (query_lower in key.lower() or
-                query_lower in info.get('issue', '').lower() or
-                any(query_lower in s.lower() for s in info.get('symptoms', [])) or
-                any(query_lower in s.lower() for s in info.get('solutions', []))):
-                
+            # Check if query matches key, issue, symptoms, or solutions
+            if query_lower in self._search_text[key]:
                 results.append({
                     'topic': key.replace('_', ' ').title(),
                     'issue': info.get('issue'),
@@ -7,6 +7,8 @@ import win32com.client
 import pythoncom
 import atexit
 import logging
+import threading
+from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,7 @@ class FastQBConnection:
     """Fast QuickBooks connection using QBFC SDK"""
     
     _instance = None
+    QBFC_VERSION = 16
     
     def __new__(cls):
         if cls._instance is None:
@@ -27,6 +30,9 @@ class FastQBConnection:
             self.is_connected = False
             self.request_set = None
             self.response_set = None
+            # Callers currently inside session() - close_when_idle() won't cut them off
+            self._active_sessions = 0
+            self._session_lock = threading.Lock()
             # Don't register atexit for MCP server - it needs to stay connected
             # atexit.register(self.disconnect)
     
@@ -62,7 +68,7 @@ class FastQBConnection:
                 raise ConnectionError("Cannot connect to QuickBooks")
         
         # Create message set request
-        self.request_set = self.qb.CreateMsgSetRequest("US", 16, 0)
+        self.request_set = self.qb.CreateMsgSetRequest("US", self.QBFC_VERSION, 0)
         self.request_set.Attributes.OnError = 0  # stopOnError
         return self.request_set
     
@@ -79,6 +85,67 @@ class FastQBConnection:
             logger.error(f"Request failed: {e}")
             raise
     
+    def process_request_set_xml(self, request_set) -> str:
+        """Process a request set and return the whole response as one QBXML string
+        
+        One COM call for every row and field - parse it with ElementTree instead
+        of walking the response objects a property at a time.
+        """
+        return self.process_request_set(request_set).ToXMLString()
+    
+    def process_qbxml(self, requests_xml: str, on_error: str = 'stopOnError'):
+        """Process raw QBXML request elements and return the response set
+        
+        Returns the same response set as process_request_set, but skips building
+        the request one COM call at a time - use for hot, templated queries.
+        
+        Args:
+            requests_xml: One or more *Rq elements
+            on_error: 'stopOnError' or 'continueOnError'
+        """
+        if not self.is_connected:
+            if not self.connect():
+                raise ConnectionError("Cannot connect to QuickBooks")
+        
+        xml = ('<?xml version="1.0" encoding="utf-8"?>'
+               f'<?qbxml version="{self.QBFC_VERSION}.0"?>'
+               f'<QBXML><QBXMLMsgsRq onError="{on_error}">{requests_xml}</QBXMLMsgsRq></QBXML>')
+        try:
+            self.response_set = self.qb.DoRequestsFromXMLString(xml)
+            return self.response_set
+        except Exception as e:
+            logger.error(f"QBXML request failed: {e}")
+            raise
+    
+    @contextmanager
+    def session(self, close_when_idle: bool = False):
+        """Scoped use of the shared session
+        
+        The connection normally stays open for the next caller. With
+        close_when_idle=True it is closed on exit, but only if no other
+        session() is still active.
+        """
+        if not self.connect():
+            raise ConnectionError("Cannot connect to QuickBooks")
+        with self._session_lock:
+            self._active_sessions += 1
+        try:
+            yield self
+        finally:
+            with self._session_lock:
+                self._active_sessions -= 1
+            if close_when_idle:
+                self.close_when_idle()
+    
+    def close_when_idle(self) -> bool:
+        """Disconnect unless a session() is active; returns whether it disconnected"""
+        with self._session_lock:
+            if self._active_sessions:
+                logger.debug(f"Keeping QuickBooks connection open for {self._active_sessions} active session(s)")
+                return False
+            self.disconnect()
+            return True
+    
     def disconnect(self):
         """Disconnect from QuickBooks"""
         try:
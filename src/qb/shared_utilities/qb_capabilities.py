@@ -0,0 +1,38 @@
+"""
+Per-process cache of optional QBFC request features
+Remembers which optional filter paths the installed QBFC build rejects so
+they are not retried (and their COM exceptions not raised) on every request
+"""
+
+import logging
+from typing import Callable, Dict, Tuple
+from shared_utilities.fast_qb_connection import FastQBConnection
+
+logger = logging.getLogger(__name__)
+
+# (QBFC version, attribute path) -> whether applying it worked
+_QB_CAP_CACHE: Dict[Tuple[int, str], bool] = {}
+
+
+def apply_optional(path: str, apply: Callable[[], object]) -> bool:
+    """
+    Run apply() for an optional request feature, probing its support once
+    
+    Args:
+        path: Dotted QBFC attribute path, used as the cache key
+        apply: Callable that sets the feature on a request
+    
+    Returns:
+        True if the feature was applied, False if unsupported
+    """
+    key = (FastQBConnection.QBFC_VERSION, path)
+    if not _QB_CAP_CACHE.get(key, True):
+        return False
+    try:
+        apply()
+        _QB_CAP_CACHE[key] = True
+        return True
+    except Exception as e:
+        logger.warning(f"[QBCapabilities] {path} not supported, skipping from now on: {e}")
+        _QB_CAP_CACHE[key] = False
+        return False
@@ -0,0 +1,86 @@
+"""
+Short-lived cache for report query results
+Lets back-to-back identical report calls skip the QuickBooks round-trip
+"""
+
+import copy
+import threading
+import time
+import logging
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class ReportCache:
+    """Size-bounded cache of report results with TTL"""
+    
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 64, copy_values: bool = True):
+        """Initialize cache with time-to-live in seconds and an entry limit
+        
+        copy_values=False stores and hands out the values themselves - only for
+        values that are never mutated (e.g. frozen to tuples / read-only views).
+        """
+        self.cache = {}
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.copy_values = copy_values
+        self.lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a copy of the cached value if not expired"""
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            
+            value, timestamp = entry
+            if time.time() - timestamp >= self.ttl:
+                self.cache.pop(key, None)
+                logger.debug(f"Report cache expired for key: {key}")
+                return None
+        
+        logger.debug(f"Report cache hit for key: {key}")
+        # Callers may mutate the results, so never hand out the cached objects
+        return copy.deepcopy(value) if self.copy_values else value
+    
+    def set(self, key: Hashable, value: Any):
+        """Cache a copy of value, evicting the oldest entry when full"""
+        if self.copy_values:
+            value = copy.deepcopy(value)
+        with self.lock:
+            self.cache.pop(key, None)
+            while len(self.cache) >= self.max_entries:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = (value, time.time())
+    
+    def discard(self, match: Callable[[Hashable], bool]):
+        """Drop every entry whose key matches"""
+        with self.lock:
+            for key in [k for k in self.cache if match(k)]:
+                del self.cache[key]
+    
+    def clear(self):
+        """Clear all cached reports"""
+        with self.lock:
+            self.cache.clear()
+        logger.debug("Report cache cleared")
+
+# Global cache instances
+report_cache = ReportCache(ttl_seconds=30, max_entries=64)
+job_report_cache = ReportCache(ttl_seconds=60, max_entries=64)  # keys: (report name, job_name, ...)
+# Longer-lived base for incremental (modified-since) refreshes of job invoices
+job_invoice_cache = ReportCache(ttl_seconds=900, max_entries=64)
+# Transaction searches - keys: (search name, amount, date_from, date_to, ...)
+search_cache = ReportCache(ttl_seconds=60, max_entries=128)
+# Parsed report rows behind the amount searches - frozen, so served without copying
+# (a deepcopy of a large report costs more than the search itself)
+report_rows_cache = ReportCache(ttl_seconds=60, max_entries=16, copy_values=False)
+
+
+def clear_report_cache():
+    """Drop all cached reports - call after any QuickBooks write"""
+    report_cache.clear()
+    job_report_cache.clear()
+    job_invoice_cache.clear()
+    search_cache.clear()
+    report_rows_cache.clear()